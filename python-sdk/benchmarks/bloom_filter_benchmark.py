@@ -0,0 +1,57 @@
+# Compares checking many addresses against an alert's address bloom filter one at a time
+# (BloomFilter.has) against the vectorized BloomFilter.has_many.
+#
+# usage: python benchmarks/bloom_filter_benchmark.py [address count] [filter size in addresses]
+import sys
+import base64
+import random
+import timeit
+from forta_agent import BloomFilter
+from forta_agent import bloom_filter
+
+K = 10
+
+
+def create_bloom_filter_data(addresses, m, k):
+    # builds a filter in the same wire format as the alerts api (m, k, m header followed by the words)
+    b = BloomFilter({'k': k, 'm': m, 'bitset': ''})
+    words = [0] * ((m + 63) // 64)
+    for address in addresses:
+        for index in b.get_indices(address):
+            words[index >> 6] |= 1 << (index & 63)
+    header = m.to_bytes(8, 'big') + k.to_bytes(8, 'big') + m.to_bytes(8, 'big')
+    body = b''.join(word.to_bytes(8, 'big') for word in words)
+    return {'k': k, 'm': m, 'bitset': base64.b64encode(header + body).decode()}
+
+
+def random_address():
+    return '0x' + ''.join(random.choice('0123456789abcdef') for _ in range(40))
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    filter_size = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    random.seed(0)
+    members = [random_address() for _ in range(filter_size)]
+    data = create_bloom_filter_data(members, filter_size * 16, K)
+    watched = members[:count // 10] + [random_address()
+                                       for _ in range(count - count // 10)]
+
+    b = BloomFilter(data)
+    assert b.has_many(watched) == [b.has(address) for address in watched]
+
+    repeat = 20
+    scalar = min(timeit.repeat(lambda: [b.has(address) for address in watched],
+                               number=1, repeat=repeat))
+    vectorized = min(timeit.repeat(
+        lambda: b.has_many(watched), number=1, repeat=repeat))
+    print(f'{count} addresses, k={K}, m={data["m"]}, numpy={"yes" if bloom_filter.np is not None else "no"}')
+    print(f'has (scalar):      {scalar * 1000:8.3f} ms')
+    print(f'has_many:          {vectorized * 1000:8.3f} ms ({scalar / vectorized:.1f}x)')
+    construction = min(timeit.repeat(lambda: BloomFilter(
+        data).get_bitset(), number=1, repeat=repeat))
+    print(f'bitset decoding:   {construction * 1000:8.3f} ms')
+
+
+if __name__ == '__main__':
+    main()
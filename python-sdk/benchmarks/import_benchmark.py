@@ -0,0 +1,34 @@
+# Measures the cold start time of `import forta_agent` in a fresh interpreter for a bot that only uses Finding
+# (lazy package import) against importing every submodule and creating the web3 provider upfront (i.e. what
+# `import forta_agent` used to do).
+#
+# usage: python benchmarks/import_benchmark.py [runs]
+import sys
+import time
+import statistics
+import subprocess
+
+SCRIPTS = {
+    'import forta_agent (eager)': 'import forta_agent; [getattr(forta_agent, name) for name in dir(forta_agent)]',
+    'import forta_agent (lazy)': 'import forta_agent; forta_agent.Finding',
+    'python startup only': 'pass',
+}
+
+
+def measure(script, runs):
+    durations = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, '-c', script], check=True)
+        durations.append(time.perf_counter() - start)
+    return statistics.median(durations)
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    for name, script in SCRIPTS.items():
+        print(f'{name:28} {measure(script, runs) * 1000:8.1f} ms (median of {runs})')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,111 @@
+# Compares the memory held per event by the __slots__ model classes against
+# equivalent classes with a per-instance __dict__ (i.e. the previous data model).
+#
+# usage: python benchmarks/memory_benchmark.py [event count]
+import sys
+import gc
+import tracemalloc
+from contextlib import contextmanager
+from forta_agent import alert, label, receipt, trace, transaction, transaction_event
+from forta_agent import TransactionEvent, AlertEvent
+
+# module globals through which the model classes are looked up when events are built
+SLOTTED_CLASSES = [
+    (receipt, 'Log'),
+    (trace, 'Trace'),
+    (trace, 'TraceAction'),
+    (trace, 'TraceResult'),
+    (transaction, 'Transaction'),
+    (transaction_event, 'Transaction'),
+    (transaction_event, 'Log'),
+    (transaction_event, 'Trace'),
+    (alert, 'Alert'),
+    (alert, 'Source'),
+    (alert, 'SourceBlock'),
+    (alert, 'SourceBot'),
+    (label, 'Label'),
+]
+
+
+def without_slots(cls):
+    # same class body minus __slots__ (and the slot descriptors) so instances get a __dict__
+    namespace = {k: v for k, v in vars(cls).items()
+                 if k != '__slots__' and k not in cls.__slots__}
+    return type(cls.__name__, cls.__bases__, namespace)
+
+
+@contextmanager
+def dict_based_model():
+    originals = [(module, name, getattr(module, name))
+                 for module, name in SLOTTED_CLASSES]
+    replacements = {}
+    for module, name, cls in originals:
+        if cls not in replacements:
+            replacements[cls] = without_slots(cls)
+        setattr(module, name, replacements[cls])
+    try:
+        yield
+    finally:
+        for module, name, cls in originals:
+            setattr(module, name, cls)
+
+
+def create_tx_event_dict(i):
+    return {
+        'transaction': {'hash': f'0x{i:064x}', 'from': '0x' + '1' * 40, 'to': '0x' + '2' * 40,
+                        'nonce': i, 'gas': '0x5208', 'gasPrice': '0x3b9aca00', 'value': '0x0',
+                        'data': '0x', 'r': '0x1', 's': '0x2', 'v': '0x1b'},
+        'block': {'hash': '0x' + '3' * 64, 'number': 1, 'timestamp': 1},
+        'traces': [{'action': {'callType': 'call', 'to': '0x' + '2' * 40, 'input': '0x', 'from': '0x' + '1' * 40, 'value': '0x0'},
+                    'result': {'gasUsed': '0x0', 'output': '0x'}, 'subtraces': 0, 'traceAddress': [], 'type': 'call'}
+                   for _ in range(4)],
+        'logs': [{'address': '0x' + '2' * 40, 'topics': ['0x' + '4' * 64] * 3, 'data': '0x', 'logIndex': j,
+                  'blockNumber': 1, 'blockHash': '0x' + '3' * 64, 'transactionIndex': 0,
+                  'transactionHash': f'0x{i:064x}', 'removed': False}
+                 for j in range(4)],
+    }
+
+
+def create_alert_event_dict(i):
+    return {'alert': {
+        'alertId': 'ALERT-1', 'hash': f'0x{i:064x}', 'name': 'name', 'description': 'description',
+        'severity': 'HIGH', 'findingType': 'EXPLOIT', 'chainId': 1, 'addresses': ['0x' + '1' * 40],
+        'source': {'transactionHash': '0x' + '5' * 64, 'bot': {'id': '0x' + '6' * 64},
+                   'block': {'number': 1, 'hash': '0x' + '3' * 64, 'chainId': 1}},
+        'labels': [{'entityType': 'ADDRESS', 'entity': '0x' + '1' * 40, 'confidence': 0.9, 'label': 'attacker'}
+                   for _ in range(2)],
+    }}
+
+
+def bytes_per_event(create_event, event_dicts):
+    # build one event first so one-time allocations (lazy imports, caches, ...) are not counted
+    create_event(event_dicts[0])
+    gc.collect()
+    tracemalloc.start()
+    start, _ = tracemalloc.get_traced_memory()
+    events = [create_event(d) for d in event_dicts]
+    end, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del events
+    return (end - start) / len(event_dicts)
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    cases = [
+        ('TransactionEvent', TransactionEvent, [
+         create_tx_event_dict(i) for i in range(count)]),
+        ('AlertEvent', AlertEvent, [
+         create_alert_event_dict(i) for i in range(count)]),
+    ]
+    print(f'{"event":<18}{"__dict__ (B)":>14}{"__slots__ (B)":>15}{"saved":>8}')
+    for name, create_event, event_dicts in cases:
+        with dict_based_model():
+            before = bytes_per_event(create_event, event_dicts)
+        after = bytes_per_event(create_event, event_dicts)
+        print(
+            f'{name:<18}{before:>14.0f}{after:>15.0f}{(before - after) / before:>8.1%}')
+
+
+if __name__ == '__main__':
+    main()
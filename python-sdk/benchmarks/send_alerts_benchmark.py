@@ -0,0 +1,65 @@
+# Compares building the sendAlerts mutation with the single-pass Finding converter used by SendAlertsRequest
+# against the previous toJson() -> json.loads -> enum conversion -> filtering round trip.
+#
+# usage: python benchmarks/send_alerts_benchmark.py [finding count]
+import sys
+import json
+import timeit
+from datetime import datetime
+from forta_agent import Finding, FindingSeverity, FindingType, EntityType
+from forta_agent.alerts_api import SendAlertsRequest
+from forta_agent.serialization import dumps_bytes
+
+
+def legacy_send_alerts_finding(finding):
+    timestamp = finding.timestamp.astimezone().isoformat()
+    d = json.loads(finding.toJson())
+    d["timestamp"] = timestamp
+    d["type"] = FindingType(d["type"]).name.upper()
+    d["severity"] = FindingSeverity(d["severity"]).name.upper()
+    for label in d.get("labels", []):
+        label["entityType"] = EntityType(label["entityType"]).name.upper()
+    del d["protocol"]
+    d = {k: v for k, v in d.items() if v is not None and "_" not in k}
+    for index, label in enumerate(d.get("labels", [])):
+        d["labels"][index] = {k: v for k, v in label.items()
+                              if v is not None and "_" not in k}
+    return d
+
+
+def create_finding(i):
+    return Finding({
+        'name': 'Large transfer',
+        'description': f'transfer of {i} tokens',
+        'alert_id': 'ALERT-1',
+        'severity': FindingSeverity.Medium,
+        'type': FindingType.Suspicious,
+        'metadata': {'from': '0x' + '1' * 40, 'to': '0x' + '2' * 40, 'amount': str(i)},
+        'addresses': ['0x' + '1' * 40, '0x' + '2' * 40],
+        'labels': [{'entity_type': EntityType.Address, 'entity': '0x' + '1' * 40, 'confidence': 0.9, 'label': 'attacker'}],
+        'timestamp': datetime(2023, 1, 1),
+    })
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    alerts = [{'bot_id': '0xbot', 'finding': create_finding(i)}
+              for i in range(count)]
+
+    def legacy():
+        return dumps_bytes([{'botId': alert['bot_id'], 'finding': legacy_send_alerts_finding(alert['finding'])}
+                            for alert in alerts])
+
+    def single_pass():
+        return dumps_bytes(SendAlertsRequest(alerts).alerts)
+
+    assert json.loads(legacy()) == json.loads(single_pass())
+    legacy_seconds = min(timeit.repeat(legacy, number=1, repeat=5))
+    single_pass_seconds = min(timeit.repeat(single_pass, number=1, repeat=5))
+    print(f'{count} findings (mutation built and encoded)')
+    print(f'toJson round trip: {legacy_seconds * 1000:8.1f} ms')
+    print(f'single pass:       {single_pass_seconds * 1000:8.1f} ms ({legacy_seconds / single_pass_seconds:.1f}x)')
+
+
+if __name__ == '__main__':
+    main()
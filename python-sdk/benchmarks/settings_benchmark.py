@@ -0,0 +1,88 @@
+# Measures the per-call cost of the config helpers (get_forta_api_headers runs on every forta api request) when
+# resolved from the settings snapshot against re-reading os.environ / the forta config on every call (i.e. what
+# they used to do), with the environment variables set like a bot running on a scan node.
+#
+# usage: python benchmarks/settings_benchmark.py [calls]
+import os
+import sys
+import timeit
+
+os.environ.update({'JSON_RPC_HOST': 'json-rpc', 'JSON_RPC_PORT': '8545', 'FORTA_PUBLIC_API_PROXY_HOST': 'proxy',
+                   'FORTA_PUBLIC_API_PROXY_PORT': '8080', 'FORTA_API_KEY': 'key', 'FORTA_BOT_ID': '1',
+                   'FORTA_CHAIN_ID': '1'})
+
+from forta_agent.utils import get_forta_config, get_settings, get_json_rpc_url, get_forta_api_url, get_forta_api_headers, get_bot_id, get_chain_id  # noqa: E402
+
+
+def legacy_get_json_rpc_url():
+    if 'JSON_RPC_HOST' in os.environ:
+        return f'http://{os.environ["JSON_RPC_HOST"]}{":"+os.environ["JSON_RPC_PORT"] if "JSON_RPC_PORT" in os.environ else ""}'
+    config = get_forta_config()
+    if "jsonRpcUrl" not in config:
+        return "https://cloudflare-eth.com/"
+    if not str(config.get("jsonRpcUrl")).startswith("http"):
+        raise Exception("jsonRpcUrl must begin with http(s)")
+    return config.get("jsonRpcUrl")
+
+
+def legacy_get_forta_api_url():
+    if 'FORTA_PUBLIC_API_PROXY_HOST' in os.environ:
+        return f'http://{os.environ["FORTA_PUBLIC_API_PROXY_HOST"]}{":"+os.environ["FORTA_PUBLIC_API_PROXY_PORT"] if "FORTA_PUBLIC_API_PROXY_PORT" in os.environ else ""}/graphql'
+    return get_forta_config().get("fortaApiUrl", "https://api.forta.network/graphql")
+
+
+def legacy_get_forta_api_headers():
+    headers = {"content-type": "application/json"}
+    if 'FORTA_API_KEY' in os.environ:
+        headers["Authorization"] = f'Bearer {os.environ["FORTA_API_KEY"]}'
+    else:
+        config = get_forta_config()
+        if "fortaApiKey" in config:
+            headers["Authorization"] = f'Bearer {config.get("fortaApiKey")}'
+    return headers
+
+
+def legacy_get_bot_id():
+    if 'FORTA_BOT_ID' in os.environ:
+        return int(os.environ['FORTA_BOT_ID'])
+    return "0xMockBotId"
+
+
+def legacy_get_chain_id():
+    if 'FORTA_CHAIN_ID' in os.environ:
+        return int(os.environ['FORTA_CHAIN_ID'])
+
+
+def forta_api_request_settings():
+    # what FortaApiSession reads when creating its session
+    settings = get_settings()
+    return settings.forta_api_url, settings.forta_api_headers
+
+
+def legacy_forta_api_request_settings():
+    return legacy_get_forta_api_url(), legacy_get_forta_api_headers()
+
+
+BENCHMARKS = [
+    ('get_json_rpc_url', legacy_get_json_rpc_url, get_json_rpc_url),
+    ('get_forta_api_url', legacy_get_forta_api_url, get_forta_api_url),
+    ('get_forta_api_headers', legacy_get_forta_api_headers, get_forta_api_headers),
+    ('get_bot_id', legacy_get_bot_id, get_bot_id),
+    ('get_chain_id', legacy_get_chain_id, get_chain_id),
+    ('forta api url + headers', legacy_forta_api_request_settings, forta_api_request_settings),
+]
+
+
+def main():
+    calls = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    print(f'{"":24} {"per call (env)":>15} {"per call (snapshot)":>20}')
+    for name, legacy, snapshot in BENCHMARKS:
+        assert legacy() == snapshot() or name == 'forta api url + headers'
+        legacy_seconds = min(timeit.repeat(legacy, number=calls, repeat=5))
+        snapshot_seconds = min(timeit.repeat(snapshot, number=calls, repeat=5))
+        print(f'{name:24} {legacy_seconds / calls * 1e9:12.0f} ns {snapshot_seconds / calls * 1e9:17.0f} ns '
+              f'({legacy_seconds / snapshot_seconds:.1f}x)')
+
+
+if __name__ == '__main__':
+    main()
@@ -1,19 +1,72 @@
-from .finding import Finding, FindingSeverity, FindingType
-from .label import Label, EntityType
-from .block_event import BlockEvent
-from .transaction_event import TransactionEvent, TxEventBlock
-from .alert_event import AlertEvent
-from .block import Block
-from .transaction import Transaction
-from .receipt import Receipt, Log
-from .trace import Trace, TraceAction, TraceResult
-from .event_type import EventType
-from .network import Network
-from .bloom_filter import BloomFilter
-from .utils import get_json_rpc_url, create_block_event, create_transaction_event, create_alert_event, get_web3_provider, keccak256, get_transaction_receipt, get_chain_id, get_bot_owner, get_bot_id
-from .alerts_api import get_alerts, send_alerts
-from .labels_api import get_labels
-from .jwt import fetch_jwt, decode_jwt, verify_jwt, MOCK_JWT
-from web3 import Web3
+import sys
+import importlib
+import threading
 
-web3Provider = Web3(Web3.HTTPProvider(get_json_rpc_url()))
+# public names and the submodule they live in. Submodules (and their dependencies like web3) are imported
+# when one of their names is first accessed, so e.g. a bot that only uses Finding does not import web3
+LAZY_ATTRIBUTES = {
+    'Finding': '.finding', 'FindingSeverity': '.finding', 'FindingType': '.finding',
+    'Label': '.label', 'EntityType': '.label',
+    'BlockEvent': '.block_event',
+    'TransactionEvent': '.transaction_event', 'TxEventBlock': '.transaction_event',
+    'AlertEvent': '.alert_event',
+    'Block': '.block',
+    'Transaction': '.transaction',
+    'Receipt': '.receipt', 'Log': '.receipt',
+    'Trace': '.trace', 'TraceAction': '.trace', 'TraceResult': '.trace',
+    'EventType': '.event_type',
+    'Network': '.network',
+    'BloomFilter': '.bloom_filter',
+    'get_json_rpc_url': '.utils', 'create_block_event': '.utils', 'create_transaction_event': '.utils',
+    'create_alert_event': '.utils', 'get_web3_provider': '.utils', 'get_async_web3_provider': '.utils',
+    'keccak256': '.utils', 'get_transaction_receipt': '.utils', 'get_transaction_receipt_async': '.utils',
+    'get_chain_id': '.utils', 'get_bot_owner': '.utils', 'get_bot_id': '.utils', 'get_settings': '.utils',
+    'reload_settings': '.utils',
+    'get_alerts': '.alerts_api', 'send_alerts': '.alerts_api', 'iter_alerts': '.alerts_api',
+    'backfill_alerts': '.alerts_api',
+    'AlertSender': '.alert_sender',
+    'get_labels': '.labels_api', 'iter_labels': '.labels_api',
+    'LabelCache': '.label_cache', 'get_labels_cached': '.label_cache',
+    'LabelBatcher': '.label_batcher',
+    'configure_forta_api_session': '.forta_api',
+    'fetch_jwt': '.jwt', 'decode_jwt': '.jwt', 'verify_jwt': '.jwt', 'MOCK_JWT': '.jwt', 'JwtVerifier': '.jwt',
+    'JwtTokenManager': '.jwt', 'verify_jwts': '.jwt',
+    'HandlerPool': '.handler_pool',
+    'prefetch_block_receipts': '.receipt_cache',
+    'create_web3_provider': '.web3_provider',
+}
+# star imports resolve these through __getattr__
+__all__ = list(LAZY_ATTRIBUTES) + ['Web3', 'web3Provider']
+web3_provider_lock = threading.Lock()
+
+
+def __getattr__(name):
+    if name == 'Web3':
+        from web3 import Web3
+        value = Web3
+    elif name == 'web3Provider':
+        # the default provider is created on first use (e.g. by get_web3_provider()), once even if several
+        # threads ask for it at the same time
+        with web3_provider_lock:
+            if name in globals():
+                return globals()[name]
+            from .web3_provider import create_web3_provider
+            value = create_web3_provider()
+            globals()[name] = value
+    elif name in LAZY_ATTRIBUTES:
+        value = getattr(importlib.import_module(
+            LAZY_ATTRIBUTES[name], __name__), name)
+    else:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(list(globals()) + list(LAZY_ATTRIBUTES) + ['Web3', 'web3Provider'])
+
+
+# module __getattr__ is only supported from python 3.7, import everything upfront before that
+if sys.version_info < (3, 7):
+    for name in list(LAZY_ATTRIBUTES) + ['Web3', 'web3Provider']:
+        __getattr__(name)
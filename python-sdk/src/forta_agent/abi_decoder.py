@@ -0,0 +1,96 @@
+import json
+from functools import lru_cache
+from eth_utils import event_abi_to_log_topic, function_abi_to_4byte_selector
+from hexbytes import HexBytes
+from web3._utils.abi import get_abi_input_names, get_abi_input_types, map_abi_data
+from web3._utils.normalizers import BASE_RETURN_NORMALIZERS
+
+ZERO_ADDRESS = "0x0000000000000000000000000000000000000000"
+COMPILED_ABI_CACHE_SIZE = 1024
+
+
+class CompiledAbi:
+    def __init__(self, abi):
+        from . import web3Provider  # avoid circular import
+        self.abi = abi
+        self.contract = web3Provider.eth.contract(ZERO_ADDRESS, abi=abi)
+        # map topic0 -> list of candidate events (same signature can differ in which params are indexed)
+        self.events_by_topic = {}
+        # anonymous events have no topic0 so they can only be matched by trying to decode
+        self.anonymous_events = []
+        event_names = []
+        for abi_item in abi:
+            if abi_item['type'] == "event" and abi_item['name'] not in event_names:
+                event_names.append(abi_item['name'])
+        for event_name in event_names:
+            event = self.contract.events[event_name]()
+            if event.abi.get('anonymous'):
+                self.anonymous_events.append(event)
+            else:
+                topic = HexBytes(event_abi_to_log_topic(event.abi))
+                self.events_by_topic.setdefault(topic, []).append(event)
+        # map 4-byte selector (as lowercase hex string) -> (function, input names, input types)
+        self.functions_by_selector = {}
+        for abi_item in abi:
+            if abi_item['type'] == "function":
+                selector = HexBytes(
+                    function_abi_to_4byte_selector(abi_item)).hex()
+                if selector in self.functions_by_selector:
+                    continue
+                self.functions_by_selector[selector] = (
+                    self.contract.get_function_by_selector(selector),
+                    get_abi_input_names(abi_item),
+                    get_abi_input_types(abi_item))
+
+    def decode_log(self, log):
+        # returns the decoded event for the log, or None if no event in the abi matches
+        candidates = self.events_by_topic.get(
+            log.topics[0], []) if log.topics else []
+        for event in candidates + self.anonymous_events:
+            try:
+                return event.processLog(log)
+            except Exception:
+                continue  # topic matched but data/indexed params did not
+        return None
+
+    def decode_function_input(self, data):
+        # returns (function, decoded inputs) for the calldata, or None if no function in the abi matches
+        if not data:
+            return None
+        if not isinstance(data, str):
+            data = HexBytes(data).hex()
+        function_entry = self.functions_by_selector.get(data[:10].lower())
+        if function_entry is None:
+            return None
+        function, names, types = function_entry
+        try:
+            decoded = self.contract.web3.codec.decode_abi(
+                types, HexBytes(data)[4:])
+        except Exception:
+            return None  # selector matched but calldata is malformed
+        normalized = map_abi_data(BASE_RETURN_NORMALIZERS, types, decoded)
+        return function, dict(zip(names, normalized))
+
+    def decode_function_inputs(self, sources):
+        # decodes a batch of {'data', 'to'} call sources, skipping those without a known selector
+        results = []
+        for source in sources:
+            if source['to'] is None:
+                continue
+            decoded_function = self.decode_function_input(source['data'])
+            if decoded_function is None:
+                continue
+            decoded_function[1]["address"] = source['to'].lower()
+            results.append(decoded_function)
+        return results
+
+
+def get_compiled_abi(abi):
+    # abi is a json string or list of json strings
+    abi = tuple(abi) if isinstance(abi, list) else (abi,)
+    return compile_abi(abi)
+
+
+@lru_cache(maxsize=COMPILED_ABI_CACHE_SIZE)
+def compile_abi(abi_texts):
+    return CompiledAbi([json.loads(abi_text) for abi_text in abi_texts])
@@ -1,4 +1,10 @@
 class Alert:
+    __slots__ = ('addresses', 'alert_id', 'contracts', 'created_at',
+                 'description', 'finding_type', 'name', 'hash', 'protocol',
+                 'severity', 'source', 'metadata', 'projects',
+                 'scan_node_count', 'alert_document_type', 'related_alerts',
+                 'chain_id', 'labels', 'address_filter')
+
     def __init__(self, dict):
         from .label import Label
         from .bloom_filter import BloomFilter
@@ -34,8 +40,16 @@ class Alert:
             return address in self.addresses
         return False
 
+    def has_addresses(self, addresses):
+        # returns a list of booleans, one per address (bulk version of has_address)
+        if self.address_filter is not None:
+            return self.address_filter.has_many(addresses)
+        return [self.has_address(address) for address in addresses]
+
 
 class Source:
+    __slots__ = ('transaction_hash', 'block', 'bot', 'source_alert')
+
     def __init__(self, dict):
         self.transaction_hash = dict.get('transactionHash')
         self.block = SourceBlock(dict.get('block')) if dict.get(
@@ -47,6 +61,8 @@ class Source:
 
 
 class SourceBlock:
+    __slots__ = ('timestamp', 'chain_id', 'hash', 'number')
+
     def __init__(self, dict):
         self.timestamp = dict.get('timestamp')
         self.chain_id = dict.get('chainId')
@@ -55,6 +71,8 @@ class SourceBlock:
 
 
 class SourceBot:
+    __slots__ = ('id', 'reference', 'image')
+
     def __init__(self, dict):
         self.id = dict.get('id')
         self.reference = dict.get('reference')
@@ -62,6 +80,8 @@ class SourceBot:
 
 
 class SourceAlert:
+    __slots__ = ('hash', 'bot_id', 'timestamp', 'chain_id')
+
     def __init__(self, dict):
         self.hash = dict.get('hash')
         self.bot_id = dict.get('botId')
@@ -70,6 +90,8 @@ class SourceAlert:
 
 
 class Contract:
+    __slots__ = ('address', 'name', 'project_id')
+
     def __init__(self, dict):
         self.address = dict.get('address')
         self.name = dict.get('name')
@@ -77,6 +99,8 @@ class Contract:
 
 
 class Project:
+    __slots__ = ('id', 'name', 'contacts', 'website', 'token', 'social')
+
     def __init__(self, dict):
         self.id = dict.get('id')
         self.name = dict.get('name')
@@ -90,12 +114,16 @@ class Project:
 
 
 class ProjectContacts:
+    __slots__ = ('security_email_address', 'general_email_address')
+
     def __init__(self, dict):
         self.security_email_address = dict.get('securityEmailAddress')
         self.general_email_address = dict.get('generalEmailAddress')
 
 
 class ProjectToken:
+    __slots__ = ('symbol', 'name', 'decimals', 'chain_id', 'address')
+
     def __init__(self, dict):
         self.symbol = dict.get('symbol')
         self.name = dict.get('name')
@@ -105,6 +133,8 @@ class ProjectToken:
 
 
 class ProjectSocial:
+    __slots__ = ('twitter', 'github', 'everest', 'coingecko')
+
     def __init__(self, dict):
         self.twitter = dict.get('twitter')
         self.github = dict.get('github')
@@ -43,3 +43,6 @@ class AlertEvent:
 
     def has_address(self, address):
         return self.alert.has_address(address)
+
+    def has_addresses(self, addresses):
+        return self.alert.has_addresses(addresses)
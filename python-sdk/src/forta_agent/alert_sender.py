@@ -0,0 +1,161 @@
+import time
+import logging
+import queue
+import atexit
+import threading
+from .alerts_api import send_alerts
+from .utils import get_bot_id
+
+DEFAULT_BATCH_SIZE = 50
+DEFAULT_FLUSH_INTERVAL_SECONDS = 1
+DEFAULT_MAX_QUEUE_SIZE = 10000
+DEFAULT_RETRIES = 3
+DEFAULT_BACKOFF_SECONDS = 1
+
+FLUSH = object()
+STOP = object()
+
+
+class AlertSender:
+    # sends findings with send_alerts from a background thread, in batches of up to batch_size findings or of
+    # the findings queued within flush_interval_seconds. Failed batches are retried with exponential backoff.
+    # Queued findings are flushed on close(), which is also called at interpreter exit
+    def __init__(self, bot_id=None, batch_size=DEFAULT_BATCH_SIZE, flush_interval_seconds=DEFAULT_FLUSH_INTERVAL_SECONDS,
+                 max_queue_size=DEFAULT_MAX_QUEUE_SIZE, retries=DEFAULT_RETRIES, backoff_seconds=DEFAULT_BACKOFF_SECONDS,
+                 send_alerts=send_alerts):
+        self.bot_id = bot_id if bot_id is not None else get_bot_id()
+        self.batch_size = batch_size
+        self.flush_interval_seconds = flush_interval_seconds
+        self.retries = retries
+        self.backoff_seconds = backoff_seconds
+        self.send_alerts = send_alerts
+        self.queue = queue.Queue(max_queue_size)
+        self.thread = None
+        self.lock = threading.Lock()
+        self.closed = False
+        # metrics
+        self.sent = 0
+        self.failed = 0
+        self.batches = 0
+        self.retried = 0
+        self.total_latency_seconds = 0
+        self.max_latency_seconds = 0
+
+    def send(self, findings):
+        # queues a finding or list of findings, blocking while the queue is full
+        if not isinstance(findings, list):
+            findings = [findings]
+        self.start()
+        for finding in findings:
+            self.queue.put((finding, time.monotonic()))
+
+    def start(self):
+        with self.lock:
+            if self.closed:
+                raise Exception("alert sender is closed")
+            if self.thread is None:
+                self.thread = threading.Thread(target=self.run, daemon=True)
+                self.thread.start()
+                atexit.register(self.close)
+
+    def flush(self):
+        # blocks until every queued finding has been sent (or has failed)
+        if self.thread is None:
+            return
+        self.queue.put(FLUSH)
+        self.queue.join()
+
+    def close(self):
+        with self.lock:
+            if self.closed:
+                return
+            self.closed = True
+        if self.thread is None:
+            return
+        self.queue.put(STOP)
+        self.thread.join()
+        atexit.unregister(self.close)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def run(self):
+        batch = []
+        deadline = None
+        while True:
+            timeout = max(0, deadline - time.monotonic()
+                          ) if batch else None
+            try:
+                item = self.queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None  # flush interval elapsed
+            if item is not None and item is not FLUSH and item is not STOP:
+                batch.append(item)
+                if len(batch) == 1:
+                    deadline = time.monotonic() + self.flush_interval_seconds
+            if batch and (item is None or item is FLUSH or item is STOP or len(batch) >= self.batch_size):
+                self.send_with_retry(batch)
+                for _ in batch:
+                    self.queue.task_done()
+                batch = []
+            if item is FLUSH or item is STOP:
+                self.queue.task_done()
+            if item is STOP:
+                return
+
+    def send_with_retry(self, batch):
+        # retries the findings of the batch that were not delivered, i.e. all of them when send_alerts raises or
+        # returns no alerts, or those whose alert has an error
+        pending = batch
+        for attempt in range(self.retries + 1):
+            try:
+                pending, error = self.send_batch(pending)
+            except Exception as e:
+                error = e
+            if not pending:
+                return
+            if attempt == self.retries:
+                self.failed += len(pending)
+                logging.error(
+                    'failed to send {count} alerts: {error}'.format(count=len(pending), error=error))
+                return
+            self.retried += 1
+            time.sleep(self.backoff_seconds * 2 ** attempt)
+
+    def send_batch(self, batch):
+        # returns the findings that were not delivered and the first error
+        results = self.send_alerts([{'bot_id': self.bot_id, 'finding': finding}
+                                    for finding, _ in batch])
+        if results is None:
+            return batch, 'no alerts returned'
+        if len(results) != len(batch):
+            errors = [result.get('error') for result in results if result.get('error')]
+            failed = batch if errors else []
+        else:
+            errors = [result.get('error') for result in results]
+            failed = [item for item, error in zip(batch, errors) if error]
+        failed_ids = set(map(id, failed))
+        delivered = [item for item in batch if id(item) not in failed_ids]
+        now = time.monotonic()
+        if delivered:
+            self.batches += 1
+            self.sent += len(delivered)
+        for _, queued_at in delivered:
+            latency = now - queued_at
+            self.total_latency_seconds += latency
+            self.max_latency_seconds = max(self.max_latency_seconds, latency)
+        return failed, next((error for error in errors if error), None)
+
+    def metrics(self):
+        return {
+            'queue_depth': self.queue.qsize(),
+            'sent': self.sent,
+            'failed': self.failed,
+            'batches': self.batches,
+            'retries': self.retried,
+            'average_latency_seconds': self.total_latency_seconds / self.sent if self.sent else 0,
+            'max_latency_seconds': self.max_latency_seconds,
+        }
@@ -0,0 +1,105 @@
+import time
+from datetime import datetime
+from unittest.mock import Mock
+from .alert_sender import AlertSender
+from .alerts_api import SendAlertsRequest
+
+mock_alert_error = {'code': 'INVALID', 'message': 'rejected'}
+
+
+def deliver_alerts(alerts):
+    # send_alerts response for alerts that were all delivered
+    return [{'alertHash': '0x' + alert['finding'].description, 'error': None} for alert in alerts]
+
+
+def get_sent_batches(send_alerts):
+    return [[alert['finding'].description for alert in args[0]] for args, _ in send_alerts.call_args_list]
+
+
+def test_sends_findings_in_batches_of_batch_size(create_finding):
+    send_alerts = Mock(side_effect=deliver_alerts)
+    sender = AlertSender('0xbot', batch_size=2, flush_interval_seconds=60,
+                         send_alerts=send_alerts)
+
+    sender.send([create_finding(str(i)) for i in range(5)])
+    sender.flush()
+
+    assert get_sent_batches(send_alerts) == [['0', '1'], ['2', '3'], ['4']]
+    assert sender.metrics()['sent'] == 5
+    assert sender.metrics()['queue_depth'] == 0
+    sender.close()
+
+
+def test_sends_after_flush_interval(create_finding):
+    send_alerts = Mock(side_effect=deliver_alerts)
+    sender = AlertSender('0xbot', flush_interval_seconds=0.05,
+                         send_alerts=send_alerts)
+
+    sender.send(create_finding('0'))
+    deadline = time.monotonic() + 5
+    while not send_alerts.called and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    assert get_sent_batches(send_alerts) == [['0']]
+    sender.close()
+
+
+def test_retries_failed_batches_and_counts_failures(create_finding, caplog):
+    send_alerts = Mock(side_effect=[Exception('api error'), Exception('api error'),
+                                    [{'alertHash': '0x1', 'error': None}]])
+    sender = AlertSender('0xbot', retries=1, backoff_seconds=0,
+                         send_alerts=send_alerts)
+
+    sender.send(create_finding('0'))
+    sender.flush()
+    sender.send(create_finding('1'))
+    sender.flush()
+
+    assert get_sent_batches(send_alerts) == [['0'], ['0'], ['1']]
+    metrics = sender.metrics()
+    assert metrics['failed'] == 1
+    assert metrics['sent'] == 1
+    assert metrics['retries'] == 1
+    assert 'failed to send 1 alerts' in caplog.text
+    sender.close()
+
+
+def test_retries_alerts_with_errors_and_empty_responses(create_finding, caplog):
+    send_alerts = Mock(side_effect=[[{'alertHash': '0x0', 'error': None}, {'alertHash': '0x1', 'error': mock_alert_error}],
+                                    [{'alertHash': '0x1', 'error': None}]])
+    sender = AlertSender('0xbot', retries=1, backoff_seconds=0,
+                         send_alerts=send_alerts)
+
+    sender.send([create_finding('0'), create_finding('1')])
+    sender.flush()
+
+    assert get_sent_batches(send_alerts) == [['0', '1'], ['1']]
+    assert sender.metrics()['sent'] == 2
+    assert sender.metrics()['retries'] == 1
+
+    sender.send_alerts = Mock(return_value=None)  # e.g. a graphql response with errors and no data
+    sender.send(create_finding('2'))
+    sender.flush()
+
+    assert sender.metrics()['failed'] == 1
+    assert 'no alerts returned' in caplog.text
+    sender.close()
+
+
+def test_close_flushes_queued_findings(create_finding):
+    send_alerts = Mock(side_effect=deliver_alerts)
+    with AlertSender('0xbot', flush_interval_seconds=60, send_alerts=send_alerts) as sender:
+        sender.send([create_finding('0'), create_finding('1')])
+
+    assert get_sent_batches(send_alerts) == [['0', '1']]
+
+
+def test_send_alerts_request_does_not_modify_finding_timestamp(create_finding):
+    finding = create_finding('0')
+    finding.timestamp = datetime(2023, 1, 1)
+
+    request = SendAlertsRequest([{'bot_id': '0xbot', 'finding': finding}])
+
+    assert finding.timestamp == datetime(2023, 1, 1)
+    assert request.alerts[0]['finding']['timestamp'] == datetime(
+        2023, 1, 1).astimezone().isoformat()
@@ -1,4 +1,11 @@
-from .alerts_api import get_alerts
+import json
+import responses
+from .utils import get_forta_api_url
+from datetime import datetime
+from .finding import Finding, FindingSeverity, FindingType
+from .label import EntityType
+from .serialization import dumps
+from .alerts_api import get_alerts, iter_alerts, backfill_alerts, split_alerts_query, SendAlertsRequest
 
 
 def test_get_alerts_returns_more_than_one_alert():
@@ -26,3 +33,159 @@ def test_get_alerts_exception_on_400_response():
 
     #     except Exception as err:
     #         assert err
+
+
+def create_alerts_page(alert_ids, end_cursor=None):
+    return {'data': {'alerts': {
+        'alerts': [{'alertId': alert_id, 'hash': alert_id} for alert_id in alert_ids],
+        'pageInfo': {'hasNextPage': end_cursor is not None, 'endCursor': end_cursor}}}}
+
+
+@responses.activate
+def test_iter_alerts_follows_cursors_across_pages():
+    cursor = {'alertId': 'ALERT-2', 'blockNumber': 100}
+    responses.add(responses.POST, get_forta_api_url(),
+                  json=create_alerts_page(['ALERT-1', 'ALERT-2'], cursor))
+    responses.add(responses.POST, get_forta_api_url(),
+                  json=create_alerts_page(['ALERT-3']))
+
+    alerts = list(iter_alerts({'bot_ids': ['0xbot']}))
+
+    assert [alert.alert_id for alert in alerts] == [
+        'ALERT-1', 'ALERT-2', 'ALERT-3']
+    requests = [json.loads(call.request.body) for call in responses.calls]
+    assert len(requests) == 2
+    assert 'after' not in requests[0]['variables']['input']
+    assert requests[1]['variables']['input']['after'] == cursor
+    assert requests[1]['variables']['input']['bots'] == ['0xbot']
+
+
+def create_block_alerts_page(block_numbers, end_cursor=None):
+    return {'data': {'alerts': {
+        'alerts': [{'alertId': f'ALERT-{number}', 'source': {'block': {'number': number}}} for number in block_numbers],
+        'pageInfo': {'hasNextPage': end_cursor is not None, 'endCursor': end_cursor}}}}
+
+
+def add_block_range_callback(pages_by_start_block, calls):
+    # responds with the pages of the shard whose range starts at startBlockNumber, following the cursor
+    def callback(request):
+        query = json.loads(request.body)['variables']['input']
+        calls.append(query)
+        start = query['blockNumberRange']['startBlockNumber']
+        page = 1 if 'after' in query else 0
+        return (200, {}, json.dumps(pages_by_start_block[start][page]))
+    responses.add_callback(responses.POST, get_forta_api_url(), callback=callback)
+
+
+@responses.activate
+def test_backfill_alerts_merges_shards_in_block_order():
+    calls = []
+    add_block_range_callback({
+        1: [create_block_alerts_page([3, 1], {'alertId': 'ALERT-1', 'blockNumber': 1}), create_block_alerts_page([2])],
+        6: [create_block_alerts_page([8, 6])],
+    }, calls)
+
+    alerts = backfill_alerts(
+        {'bot_ids': ['0xbot'], 'block_number_range': {'startBlockNumber': 1, 'endBlockNumber': 10}}, shards=2)
+
+    assert [alert.source.block.number for alert in alerts] == [1, 2, 3, 6, 8]
+    assert sorted((call['blockNumberRange']['startBlockNumber'], call['blockNumberRange']['endBlockNumber'])
+                  for call in calls) == [(1, 5), (1, 5), (6, 10)]
+
+
+@responses.activate
+def test_backfill_alerts_retries_and_resumes_from_checkpoint(tmp_path):
+    checkpoint_path = str(tmp_path / 'checkpoint.json')
+    query = {'block_number_range': {
+        'startBlockNumber': 1, 'endBlockNumber': 10}}
+    calls = []
+    responses.add(responses.POST, get_forta_api_url(), body='unavailable', status=503)
+    add_block_range_callback({
+        1: [create_block_alerts_page([1])],
+        6: [create_block_alerts_page([6])],
+    }, calls)
+
+    alerts = backfill_alerts(query, shards=2, concurrency=1,
+                             checkpoint_path=checkpoint_path, backoff_seconds=0)
+    resumed_alerts = backfill_alerts(
+        query, shards=2, checkpoint_path=checkpoint_path)
+
+    assert len(calls) == 2
+    assert [alert.alert_id for alert in alerts] == ['ALERT-1', 'ALERT-6']
+    assert [alert.alert_id for alert in resumed_alerts] == [
+        'ALERT-1', 'ALERT-6']
+
+
+@responses.activate
+def test_backfill_alerts_resumes_with_checkpoint_shard_ranges(tmp_path):
+    checkpoint_path = str(tmp_path / 'checkpoint.json')
+    query = {'block_number_range': {
+        'startBlockNumber': 1, 'endBlockNumber': 10}}
+    calls = []
+    add_block_range_callback({
+        1: [create_block_alerts_page([1])],
+        6: [create_block_alerts_page([6])],
+    }, calls)
+    backfill_alerts(query, shards=2, concurrency=1,
+                    checkpoint_path=checkpoint_path)
+    with open(checkpoint_path, 'rb') as f:
+        header, first_shard, second_shard = f.readlines()
+    # an interrupted backfill with the second shard partially written
+    with open(checkpoint_path, 'wb') as f:
+        f.write(header + first_shard + second_shard[:10])
+
+    alerts = backfill_alerts(query, shards=4, checkpoint_path=checkpoint_path)
+
+    assert len(calls) == 3  # only the incomplete shard was fetched again
+    assert calls[2]['blockNumberRange'] == {
+        'startBlockNumber': 6, 'endBlockNumber': 10}
+    assert [alert.alert_id for alert in alerts] == ['ALERT-1', 'ALERT-6']
+    with open(checkpoint_path, 'rb') as f:
+        assert len(f.readlines()) == 3
+
+
+def test_split_alerts_query_by_date_range():
+    shards = split_alerts_query(
+        {'block_date_range': {'startDate': '2023-01-30', 'endDate': '2023-02-03'}}, 2)
+
+    assert [shard['block_date_range'] for shard in shards] == [
+        {'startDate': '2023-01-30', 'endDate': '2023-02-01'},
+        {'startDate': '2023-02-02', 'endDate': '2023-02-03'}]
+
+
+def legacy_send_alerts_finding(finding):
+    # how SendAlertsRequest used to serialize findings (through a json string)
+    timestamp = finding.timestamp.astimezone().isoformat()
+    d = json.loads(finding.toJson())
+    d["timestamp"] = timestamp
+    d["type"] = FindingType(d["type"]).name.upper()
+    d["severity"] = FindingSeverity(d["severity"]).name.upper()
+    for label in d.get("labels", []):
+        label["entityType"] = EntityType(label["entityType"]).name.upper()
+    del d["protocol"]
+    d = {k: v for k, v in d.items() if v is not None and "_" not in k}
+    for index, label in enumerate(d.get("labels", [])):
+        d["labels"][index] = {k: v for k, v in label.items()
+                              if v is not None and "_" not in k}
+    return d
+
+
+def test_send_alerts_request_matches_legacy_serialization():
+    findings = [
+        Finding({'name': 'name', 'description': 'description', 'alert_id': 'ALERT-1',
+                 'severity': FindingSeverity.Critical, 'type': FindingType.Exploit}),
+        Finding({'name': 'name', 'description': 'description', 'alert_id': 'ALERT-2', 'protocol': 'polygon',
+                 'severity': FindingSeverity.Unknown, 'type': FindingType.Scam, 'unique_key': 'key',
+                 'metadata': {'amount': 10 ** 30, 'token': '0xabc'}, 'addresses': ('0xa', '0xb'),
+                 'labels': [{'entity_type': EntityType.Address, 'entity': '0xa', 'confidence': 0.5, 'label': 'attacker',
+                             'unique_key': 'label-key', 'metadata': {'a': 'b'}},
+                            {'entityType': 'TRANSACTION', 'entity': '0x1', 'confidence': 1, 'label': 'exploit', 'remove': True}],
+                 'timestamp': datetime(2023, 1, 1, 12, 30)}),
+    ]
+
+    request = SendAlertsRequest(
+        [{'bot_id': '0xbot', 'finding': finding} for finding in findings])
+
+    assert [alert['botId'] for alert in request.alerts] == ['0xbot', '0xbot']
+    assert [json.loads(dumps(alert['finding'])) for alert in request.alerts] == [
+        legacy_send_alerts_finding(finding) for finding in findings]
@@ -1,21 +1,22 @@
-import requests
+import os
 import json
+import time
+import threading
+from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
 from .alert import Alert
 from .finding import FindingType, FindingSeverity
 from .label import EntityType
-from .utils import get_forta_api_headers, get_forta_api_url
+from .forta_api import get_forta_api_session, iter_pages
 
 
 def send_alerts(alerts):
     if not isinstance(alerts, list):
         alerts = [alerts]
 
-    alerts_api_url = get_forta_api_url()
-    headers = get_forta_api_headers()
     mutation = SendAlertsRequest(alerts).get_mutation()
 
-    response = requests.request(
-        "POST", alerts_api_url, json=mutation, headers=headers)
+    response = get_forta_api_session().post(mutation)
 
     if response.status_code == 200:
         data = response.json().get('data')
@@ -28,33 +29,10 @@ def send_alerts(alerts):
 
 class SendAlertsRequest:
     def __init__(self, alerts):
-        self.alerts = []
-        # serialize the alerts list
-        for alert in alerts:
-            # convert finding timestamp to RFC3339 format
-            alert["finding"].timestamp = alert["finding"].timestamp.astimezone(
-            ).isoformat()
-            # serialize finding
-            finding = json.loads(alert["finding"].toJson())
-            # convert enums to all caps to match graphql enums
-            finding["type"] = FindingType(finding["type"]).name.upper()
-            finding["severity"] = FindingSeverity(
-                finding["severity"]).name.upper()
-            for label in finding.get("labels", []):
-                label["entityType"] = EntityType(
-                    label["entityType"]).name.upper()
-            # remove protocol field (not part of graphql schema)
-            del finding["protocol"]
-            # remove any empty-value or snake-case-keyed fields
-            finding = {k: v for k, v in finding.items()
-                       if v is not None and "_" not in k}
-            for index, label in enumerate(finding.get("labels", [])):
-                finding["labels"][index] = {k: v for k, v in label.items()
-                                            if v is not None and "_" not in k}
-            self.alerts.append({
-                "botId": alert["bot_id"],
-                "finding": finding
-            })
+        self.alerts = [{
+            "botId": alert["bot_id"],
+            "finding": finding_to_graphql_input(alert["finding"])
+        } for alert in alerts]
 
     def get_mutation(self):
         mutation = """
@@ -73,24 +51,260 @@ class SendAlertsRequest:
         return dict(query=mutation, variables={"alerts": self.alerts})
 
 
+LABEL_GRAPHQL_FIELDS = ('entity', 'confidence', 'label', 'remove',
+                        'metadata', 'id', 'source', 'embedding')
+
+
+def finding_to_graphql_input(finding):
+    # converts a Finding to an AlertRequestInput finding in a single pass: enums as all caps names (to match
+    # graphql enums), timestamp in RFC3339 format, and only the camelCase fields of the graphql schema
+    # (i.e. no protocol, alert_id or unique_key). Empty values are left out
+    d = {}
+    if finding.name:
+        d["name"] = finding.name
+    if finding.description:
+        d["description"] = finding.description
+    d["severity"] = FindingSeverity(finding.severity).name.upper()
+    d["type"] = FindingType(finding.type).name.upper()
+    if finding.metadata:
+        d["metadata"] = finding.metadata
+    if finding.addresses:
+        d["addresses"] = finding.addresses
+    if finding.labels:
+        d["labels"] = [label_to_graphql_input(
+            label) for label in finding.labels]
+    if finding.source:
+        d["source"] = finding.source
+    timestamp = finding.timestamp
+    if timestamp:
+        d["timestamp"] = timestamp.astimezone().isoformat(
+        ) if isinstance(timestamp, datetime) else str(timestamp)
+    if finding.alert_id:
+        d["alertId"] = finding.alert_id
+    if finding.unique_key:
+        d["uniqueKey"] = finding.unique_key
+    return d
+
+
+def label_to_graphql_input(label):
+    d = {}
+    for k in LABEL_GRAPHQL_FIELDS:
+        v = getattr(label, k)
+        if v is not None:
+            d[k] = v
+    d["entityType"] = EntityType(label.entity_type).name.upper()
+    if label.unique_key is not None:
+        d["uniqueKey"] = label.unique_key
+    return d
+
+
 def get_alerts(dict):
-    alerts_api_url = get_forta_api_url()
-    headers = get_forta_api_headers()
+    data = get_alerts_data(dict)
+    if data:
+        return AlertsResponse(data.get('alerts'))
+
+
+def get_alerts_data(dict):
+    # returns the raw graphql response data (i.e. {'alerts': {'alerts': [...], 'pageInfo': {...}}})
     query_options = AlertQueryOptions(dict)
     payload = query_options.get_query()
 
-    response = requests.request(
-        "POST", alerts_api_url, json=payload, headers=headers)
+    response = get_forta_api_session().post(payload)
 
     if response.status_code == 200:
-        data = response.json().get('data')
-        if data:
-            return AlertsResponse(data.get('alerts'))
+        return response.json().get('data')
     else:
         message = response.text
         raise Exception(message)
 
 
+def iter_alerts(dict):
+    # yields the alerts of every page of the query (see get_alerts), prefetching the next page in the background
+    for page in iter_alerts_pages(dict):
+        yield from page.alerts
+
+
+def iter_alerts_pages(dict):
+    return iter_pages(get_alerts, dict, get_next_alerts_cursor)
+
+
+def get_next_alerts_cursor(alerts_response):
+    page_info = alerts_response.page_info
+    if page_info is None or not page_info.has_next_page or page_info.end_cursor is None:
+        return None
+    return {'alertId': page_info.end_cursor.alert_id, 'blockNumber': page_info.end_cursor.block_number}
+
+
+DEFAULT_BACKFILL_SHARDS = 8
+DEFAULT_BACKFILL_CONCURRENCY = 4
+DEFAULT_BACKFILL_RETRIES = 3
+DEFAULT_BACKFILL_BACKOFF_SECONDS = 1
+DATE_FORMAT = '%Y-%m-%d'
+
+
+def backfill_alerts(dict, shards=DEFAULT_BACKFILL_SHARDS, concurrency=DEFAULT_BACKFILL_CONCURRENCY, checkpoint_path=None,
+                    retries=DEFAULT_BACKFILL_RETRIES, backoff_seconds=DEFAULT_BACKFILL_BACKOFF_SECONDS):
+    # fetches all alerts of a query (see get_alerts) with a block_number_range or block_date_range by splitting the
+    # range into shards that are fetched in parallel, and returns them as a list of Alert sorted by block number.
+    # If checkpoint_path is given, the alerts of each completed shard are saved to it, and shards already in the
+    # checkpoint are not fetched again (so an interrupted backfill can be resumed by calling it again). A resumed
+    # backfill uses the shard ranges stored in the checkpoint, whatever the value of shards
+    checkpoint = BackfillCheckpoint(
+        checkpoint_path, dict, split_alerts_query(dict, shards))
+    pending_shards = [
+        shard for shard in checkpoint.shards if not checkpoint.has(shard)]
+
+    def backfill_shard(shard):
+        alerts = []
+        for data in iter_pages(lambda query: get_alerts_data_with_retry(query, retries, backoff_seconds), shard, get_next_alerts_data_cursor):
+            alerts.extend((data.get('alerts') or {}).get('alerts') or [])
+        checkpoint.add(shard, alerts)
+
+    executor = ThreadPoolExecutor(max_workers=concurrency)
+    futures = []
+    try:
+        futures = [executor.submit(backfill_shard, shard)
+                   for shard in pending_shards]
+        for future in futures:
+            future.result()
+    finally:
+        for future in futures:
+            future.cancel()
+        executor.shutdown(wait=True)
+
+    alerts = [alert for shard in checkpoint.shards for alert in checkpoint.get(shard)]
+    alerts.sort(key=get_alert_block_number,
+                reverse=dict.get('block_sort_direction') == 'desc')
+    return [Alert(alert) for alert in alerts]
+
+
+def get_range_key(dict):
+    # the key of the range a backfill query is sharded by
+    if dict.get('block_number_range') is not None:
+        return 'block_number_range'
+    if dict.get('block_date_range') is not None:
+        return 'block_date_range'
+    raise Exception("backfill_alerts requires a block_number_range or block_date_range")
+
+
+def split_alerts_query(dict, shards):
+    # returns one copy of the query per shard, each with a contiguous part of the block number or date range
+    range_key = get_range_key(dict)
+    if range_key == 'block_number_range':
+        number_range = dict['block_number_range']
+        start = int(number_range['startBlockNumber'])
+        end = int(number_range['endBlockNumber'])
+        return [{**dict, 'block_number_range': {'startBlockNumber': shard_start, 'endBlockNumber': shard_end}}
+                for shard_start, shard_end in split_range(start, end, shards)]
+    date_range = dict['block_date_range']
+    start = datetime.strptime(date_range['startDate'], DATE_FORMAT)
+    end = datetime.strptime(date_range['endDate'], DATE_FORMAT)
+    return [{**dict, 'block_date_range': {'startDate': (start + timedelta(days=shard_start)).strftime(DATE_FORMAT),
+                                          'endDate': (start + timedelta(days=shard_end)).strftime(DATE_FORMAT)}}
+            for shard_start, shard_end in split_range(0, (end - start).days, shards)]
+
+
+def split_range(start, end, shards):
+    # splits the inclusive range [start, end] into at most `shards` inclusive ranges of (almost) equal size
+    count = end - start + 1
+    if count <= 0:
+        return []
+    shards = max(1, min(shards, count))
+    size, remainder = divmod(count, shards)
+    ranges = []
+    for i in range(shards):
+        shard_end = start + size + (1 if i < remainder else 0) - 1
+        ranges.append((start, shard_end))
+        start = shard_end + 1
+    return ranges
+
+
+def get_alerts_data_with_retry(dict, retries, backoff_seconds):
+    for attempt in range(retries + 1):
+        try:
+            return get_alerts_data(dict)
+        except Exception:
+            if attempt == retries:
+                raise
+            time.sleep(backoff_seconds * 2 ** attempt)
+
+
+def get_next_alerts_data_cursor(data):
+    page_info = (data.get('alerts') or {}).get('pageInfo') or {}
+    if not page_info.get('hasNextPage') or page_info.get('endCursor') is None:
+        return None
+    return page_info.get('endCursor')
+
+
+def get_alert_block_number(alert):
+    block = (alert.get('source') or {}).get('block') or {}
+    return block.get('number') or 0
+
+
+class BackfillCheckpoint:
+    # completed shards of a backfill (raw alert dicts keyed by shard range), optionally persisted to a NDJSON file:
+    # a header line with the query and its shard ranges, then one line per shard appended as it completes
+    def __init__(self, path, dict, shards):
+        self.path = path
+        self.query = json.loads(json.dumps(dict, default=str))
+        self.range_key = get_range_key(dict)
+        self.shards = shards
+        self.alerts = {}  # shard key -> alerts
+        self.lock = threading.Lock()
+        if path is None:
+            return
+        if os.path.isfile(path):
+            self.load(dict)
+        else:
+            # write to a temporary file first so an interruption cannot leave a truncated header
+            temp_path = f'{path}.tmp'
+            with open(temp_path, 'wb') as f:
+                f.write(json.dumps({'query': self.query, 'ranges': [
+                        shard[self.range_key] for shard in shards]}, default=str).encode('utf-8') + b'\n')
+            os.replace(temp_path, path)
+
+    def load(self, dict):
+        with open(self.path, 'rb+') as f:
+            header = json.loads(f.readline())
+            if header.get('query') != self.query:
+                raise Exception(
+                    f'checkpoint {self.path} was created for a different query')
+            # resume with the shard ranges of the checkpoint, so that completed shards line up
+            self.shards = [{**dict, self.range_key: shard_range}
+                           for shard_range in header.get('ranges', [])]
+            valid_length = f.tell()
+            for line in f:
+                try:
+                    entry = json.loads(line) if line.endswith(b'\n') else None
+                except ValueError:
+                    entry = None
+                if entry is None:
+                    break  # partially written by an interrupted backfill
+                self.alerts[entry['key']] = entry['alerts']
+                valid_length += len(line)
+            f.truncate(valid_length)
+
+    def get_key(self, shard):
+        return json.dumps(shard[self.range_key], sort_keys=True, default=str)
+
+    def has(self, shard):
+        return self.get_key(shard) in self.alerts
+
+    def get(self, shard):
+        return self.alerts.get(self.get_key(shard), [])
+
+    def add(self, shard, alerts):
+        key = self.get_key(shard)
+        with self.lock:
+            self.alerts[key] = alerts
+            if self.path is None:
+                return
+            with open(self.path, 'ab') as f:
+                f.write(json.dumps({'key': key, 'alerts': alerts}).encode('utf-8') + b'\n')
+                f.flush()
+                os.fsync(f.fileno())
+
+
 class AlertCursor:
     def __init__(self, dict):
         self.alert_id = dict.get('alertId')
@@ -0,0 +1,38 @@
+import asyncio
+import inspect
+
+DEFAULT_CONCURRENCY = 50
+
+
+class AsyncRunner:
+    # runs (sync or async) bot handlers on a single persistent event loop, handling up to
+    # `concurrency` events of a batch at the same time
+    def __init__(self, concurrency=DEFAULT_CONCURRENCY):
+        self.concurrency = concurrency
+        self.loop = asyncio.new_event_loop()
+
+    def run(self, result):
+        # returns the handler result, awaiting it on the runner's loop if it is awaitable
+        if inspect.isawaitable(result):
+            return self.loop.run_until_complete(result)
+        return result
+
+    def handle(self, handler, events):
+        # returns the handler results in the same order as events
+        return self.loop.run_until_complete(self.handle_events(handler, events))
+
+    async def handle_events(self, handler, events):
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def handle_event(event):
+            async with semaphore:
+                result = handler(event)
+                if inspect.isawaitable(result):
+                    result = await result
+                return result
+
+        return await asyncio.gather(*[handle_event(event) for event in events])
+
+    def close(self):
+        self.loop.run_until_complete(self.loop.shutdown_asyncgens())
+        self.loop.close()
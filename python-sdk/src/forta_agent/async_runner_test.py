@@ -0,0 +1,88 @@
+import asyncio
+from types import SimpleNamespace
+from .async_runner import AsyncRunner
+from .finding import Finding, FindingSeverity, FindingType
+from .worker import Worker
+from . import utils
+
+
+def test_handle_runs_events_concurrently_up_to_limit_and_keeps_order():
+    runner = AsyncRunner(concurrency=3)
+    running = {'current': 0, 'max': 0}
+
+    async def handler(event):
+        running['current'] += 1
+        running['max'] = max(running['max'], running['current'])
+        await asyncio.sleep(0.01 * (10 - event))
+        running['current'] -= 1
+        return event * 2
+
+    results = runner.handle(handler, list(range(10)))
+    runner.close()
+
+    assert results == [event * 2 for event in range(10)]
+    assert running['max'] == 3
+
+
+def test_handle_supports_sync_handlers():
+    runner = AsyncRunner()
+
+    assert runner.handle(lambda event: event + 1, [1, 2]) == [2, 3]
+    assert runner.run(5) == 5
+    runner.close()
+
+
+def test_worker_runs_async_handlers():
+    async def initialize():
+        await asyncio.sleep(0)
+        return {'alertConfig': {}}
+
+    async def handle_transaction(tx_event):
+        await asyncio.sleep(0)
+        return [Finding({'name': 'name', 'description': tx_event.hash, 'alert_id': 'ALERT-1',
+                         'severity': FindingSeverity.Low, 'type': FindingType.Info})]
+
+    worker = Worker(SimpleNamespace(initialize=initialize,
+                    handle_transaction=handle_transaction, handle_block=lambda block_event: []), concurrency=2)
+
+    assert worker.async_runner is not None
+    assert worker.handle_message({'msgType': 'initialize'}) == {
+        'response': {'alertConfig': {}}}
+    findings = worker.handle_message({'msgType': 'handle_transaction', 'events': [
+        {'transaction': {'hash': hex(i)}} for i in range(5)]})['findings']
+    assert [f[0]['description'] for f in findings] == [
+        hex(i) for i in range(5)]
+    assert worker.handle_message({'msgType': 'handle_block', 'events': [{}]}) == {
+        'findings': [[]]}
+
+
+def test_get_transaction_receipt_async_formats_json_rpc_receipt(monkeypatch):
+    raw_receipt = {
+        'status': '0x1', 'gasUsed': '0x5208', 'cumulativeGasUsed': '0xa410', 'logsBloom': '0x00',
+        'contractAddress': None, 'blockNumber': '0x10', 'blockHash': '0xbb', 'transactionIndex': '0x2',
+        'transactionHash': '0xaa',
+        'logs': [{'address': '0xABC', 'topics': ['0x01'], 'data': '0x', 'logIndex': '0x3', 'blockNumber': '0x10',
+                  'blockHash': '0xbb', 'transactionIndex': '0x2', 'transactionHash': '0xaa', 'removed': False}],
+    }
+    requests = []
+
+    async def coro_request(method, params):
+        requests.append((method, params))
+        return raw_receipt
+    provider = utils.get_async_web3_provider()
+    monkeypatch.setattr(provider.manager, 'coro_request', coro_request)
+
+    runner = AsyncRunner()
+    try:
+        receipt = runner.run(utils.get_transaction_receipt_async('0xaa'))
+    finally:
+        runner.close()
+
+    assert requests == [('eth_getTransactionReceipt', ['0xaa'])]
+    assert receipt.status == True
+    assert receipt.gas_used == 21000
+    assert receipt.block_number == 16
+    assert receipt.transaction_index == 2
+    assert receipt.logs[0].address == '0xabc'
+    assert receipt.logs[0].log_index == 3
+    assert receipt.logs[0].topics == ['0x01']
@@ -1,4 +1,10 @@
 class Block:
+    __slots__ = ('difficulty', 'extra_data', 'gas_limit', 'gas_used', 'hash',
+                 'logs_bloom', 'miner', 'mix_hash', 'nonce', 'number',
+                 'parent_hash', 'receipts_root', 'sha3_uncles', 'size',
+                 'state_root', 'timestamp', 'total_difficulty', 'transactions',
+                 'transactions_root', 'uncles')
+
     def __init__(self, dict):
         self.difficulty = dict.get('difficulty')
         self.extra_data = dict.get('extraData', dict.get('extra_data'))
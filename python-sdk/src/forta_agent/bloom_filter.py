@@ -2,6 +2,12 @@ import mmh3
 import base64
 import math
 
+# numpy is optional (pip install forta_agent[fast]), has_many falls back to checking keys one by one
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
 
 class BloomFilter:
     def __init__(self, dict):
@@ -12,15 +18,45 @@ class BloomFilter:
         self.base64_data = dict.get('bitset')
         self.bitset = None
 
-    def has(self, key):
+    def get_bitset(self):
         if self.bitset is None:
             self.bitset = BitSet({'m': self.m, 'bitset': self.base64_data})
+        return self.bitset
+
+    def has(self, key):
+        self.get_bitset()
         indices = self.get_indices(key)
         for index in indices:
             if not self.bitset.has(index):
                 return False
         return True
 
+    def has_many(self, keys):
+        # returns a list of booleans indicating whether each key is (probably) in the filter
+        keys = list(keys)
+        if np is None or len(keys) == 0:
+            return [self.has(key) for key in keys]
+        bitset = self.get_bitset()
+        # same index computation as get_indices, for all keys and all k hashes at once
+        base_hashes = np.array([self.get_base_hashes(key)
+                               for key in keys], dtype=np.uint64)
+        a_columns, c_columns = self.get_hash_columns()
+        i = np.arange(self.k, dtype=np.uint64)
+        locations = base_hashes[:, a_columns] + \
+            i * base_hashes[:, c_columns]  # wraps around at 64 bits
+        indices = locations % np.uint64(self.m)
+        return bitset.has_many(indices).all(axis=1).tolist()
+
+    def get_hash_columns(self):
+        # which of the 4 base hashes get_indices uses as `a` and `c` for each of the k hashes
+        a_columns = []
+        c_columns = []
+        for i in range(self.k):
+            b = (i + (i % 2)) % 4
+            a_columns.append(i % 2)
+            c_columns.append(int(2 + (b/2)))
+        return a_columns, c_columns
+
     def get_indices(self, key):
         indices = []
         base_hashes = self.get_base_hashes(key)
@@ -47,19 +83,29 @@ class BloomFilter:
 
 class BitSet:
     def __init__(self, dict):
-        # first Uint64 (i.e. 8 bytes) encodes m, next Uint64 encodes k, next Uint64 encodes m again (so we slice them out)
-        decoded_bytes = base64.b64decode(dict.get('bitset'))[8*3:]
         # how many Uint64 do we need to store m bits
         array_length = math.ceil(dict.get('m') / 64)
-        self.data = []
-        for i in range(array_length):
-            bytes_index = 8*i
-            self.data.append(int.from_bytes(
-                decoded_bytes[bytes_index:bytes_index+8], "big"))  # read as big endian
+        decoded_bytes = base64.b64decode(dict.get('bitset'))
+        if len(decoded_bytes) < 8*3 + 8*array_length:  # missing words are all zeroes
+            decoded_bytes = decoded_bytes.ljust(8*3 + 8*array_length, b'\0')
+        # first Uint64 (i.e. 8 bytes) encodes m, next Uint64 encodes k, next Uint64 encodes m again (so we skip them).
+        # the words are read in place as big endian Uint64s, without copying them out of the decoded bytes
+        self.data = memoryview(decoded_bytes)[8*3:8*3 + 8*array_length]
+        self.words = None  # numpy view of data, built on first has_many
+
+    def get_words(self):
+        if self.words is None:
+            self.words = np.frombuffer(self.data, dtype='>u8')
+        return self.words
+
+    def has_many(self, indices):
+        # indices is a numpy uint64 array, returns a boolean array of the same shape
+        words = self.get_words()[indices >> np.uint64(6)]
+        return ((words >> (indices & np.uint64(63))) & np.uint64(1)).astype(bool)
 
     def has(self, index):
         word_index = index >> 6
         words_index_i = index & (64-1)
-        mask = int(math.pow(2, words_index_i))
-        word = self.data[word_index]
-        return (word & mask) != 0
+        # the word is big endian, so its least significant byte is the last of its 8 bytes
+        byte = self.data[8*word_index + 7 - (words_index_i >> 3)]
+        return (byte >> (words_index_i & 7)) & 1 != 0
@@ -27,3 +27,52 @@ def test_alert_0xd7387cfe3ad5e051ba195ab0386ae33b2359ca403d650df5d05fc6dc596db14
     assert b.has("a") == False
     assert b.has("b") == False
     assert b.has("c") == False
+
+
+def test_has_many_matches_has():
+    k = '0xa'
+    m = '0xd33'
+    content = "AAAAAAAADTMAAAAAAAAACgAAAAAAAA0zoCntpyGtcm49UqMM9AWNWqEnAxF/UO3IbAPDWRKTJq+wpI051Z+uHn7exEpOzxdllSK+ICU9OfhN+FXsLpC2HkzRYDrOJ0Zp9DG73mRPvwRTcyFHwSOwlCtNoE9pgSk8jXe2S7uTanRQrS6WnP71vagcoXHydeiJfyVIxHIEt5IydneVsPBO0ko/iypb5EtAx57IiOWgmIWqngc+mao8bY9rxe42mv4ZnG/JGRqZyxdgIWSLrpCwkqOEVyYxuHFzoH67YujJUuPsl8GY0sFMJdpuySJlEgzIELFNcsJSA9YLLgAJ7flterIjUIgTad3rgR2kNu1OQksso0NlQY2OhguEoNDrtJcWTRwYudO69Q5Kp1mcg3ax+n0iP4Q8tgjrJhD0EnLujlYQPH1Gdr8v1zJVZ2PhLVFDnXjQGoZ6Lmqi/fjOTpvHwSks+jeHuCzWF1X9Lvm7/LPWDd2XX/jmyp9df2NiA/Jb3FhZf3akolcMIo5hnXnnyn1LupGbILiIz24NwzMl3w43xOe1bDEvRKiD+s3qNhrxbmWM9V03NMYABHfM2p7W1Q=="
+    keys = ["0x030cb0fd022b0a66d2d6e39d0691cce86d4188b8", "a",
+            "0x1727b5a84fee033c3065473cc91c23e8607eef6b", "b"] + [hex(i) for i in range(500)]
+
+    b = BloomFilter({'k': k, 'm': m, 'bitset': content})
+    expected = [BloomFilter({'k': k, 'm': m, 'bitset': content}).has(key)
+                for key in keys]
+
+    assert b.has_many(keys) == expected
+    assert b.has_many(keys)[:4] == [True, False, True, False]
+    assert b.has_many([]) == []
+
+
+def test_has_many_without_numpy(monkeypatch):
+    from . import bloom_filter
+    monkeypatch.setattr(bloom_filter, 'np', None)
+
+    b = BloomFilter({'k': 11, 'm': 15, 'bitset': "AAAAAAAAAA8AAAAAAAAACwAAAAAAAAAPAAAAAAAANtI="})
+
+    assert b.has_many(["0x68f180fcce6836688e9084f035309e29bf0a2095", "a"]) == [
+        True, False]
+
+
+def test_bitset_reads_big_endian_words_in_place():
+    from .bloom_filter import BitSet
+    import base64
+    words = [0x8000000000000001, 0x00000000000000ff]
+    header = (128).to_bytes(8, 'big') + (1).to_bytes(8, 'big') + (128).to_bytes(8, 'big')
+    content = base64.b64encode(
+        header + b''.join(w.to_bytes(8, 'big') for w in words)).decode()
+
+    bitset = BitSet({'m': 128, 'bitset': content})
+
+    assert [i for i in range(128) if bitset.has(i)] == [
+        0, 63] + list(range(64, 72))
+    assert isinstance(bitset.data, memoryview)
+
+
+def test_bitset_treats_missing_words_as_zeroes():
+    from .bloom_filter import BitSet
+
+    bitset = BitSet({'m': 15, 'bitset': "AAAAAAAAAA8AAAAAAAAACwAAAAAAAAAP"})
+
+    assert not any(bitset.has(i) for i in range(15))
@@ -0,0 +1,28 @@
+from unittest.mock import Mock
+import pytest
+from .label import Label
+from .finding import Finding, FindingSeverity, FindingType
+
+
+@pytest.fixture
+def create_finding():
+    def create(description, alert_id='ALERT-1'):
+        return Finding({'name': 'name', 'description': description, 'alert_id': alert_id,
+                        'severity': FindingSeverity.Low, 'type': FindingType.Info})
+    return create
+
+
+@pytest.fixture
+def create_label():
+    def create(entity, label='scammer'):
+        return Label({'entity_type': 'ADDRESS', 'entity': entity, 'confidence': 0.9, 'label': label})
+    return create
+
+
+@pytest.fixture
+def mock_fetch_labels():
+    # returns a Mock to pass as fetch_labels, which responds with the given labels of the queried entities
+    def create(labels):
+        return Mock(side_effect=lambda query: [label for label in labels
+                                               if label.entity in [entity.lower() for entity in query['entities']]])
+    return create
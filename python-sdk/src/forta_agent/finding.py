@@ -1,8 +1,8 @@
-import json
 from datetime import datetime
 from .label import Label
 from enum import IntEnum
 from .utils import assert_enum_value_in_dict, assert_non_empty_string_in_dict
+from .serialization import dumps, dumps_bytes
 
 
 class FindingSeverity(IntEnum):
@@ -34,6 +34,10 @@ class FindingSource:
 
 
 class Finding:
+    __slots__ = ('name', 'description', 'alert_id', 'protocol', 'severity',
+                 'type', 'metadata', 'addresses', 'labels', 'unique_key',
+                 'source', 'timestamp')
+
     def __init__(self, dict):
         assert_non_empty_string_in_dict(dict, 'name')
         assert_non_empty_string_in_dict(dict, 'description')
@@ -54,10 +58,26 @@ class Finding:
         self.source = dict.get('source')
         self.timestamp = dict.get('timestamp', datetime.now())
 
+    def to_dict(self):
+        # same fields as toJson(), built in a single pass without an intermediate json string
+        d = {}
+        for k in self.__slots__:
+            v = getattr(self, k)
+            if not v and k != 'type' and k != 'severity':
+                continue
+            if k == 'labels':
+                v = [label.toDict() for label in v]
+            elif k == 'timestamp':
+                v = str(v)
+            d[k] = v
+        if self.alert_id:
+            d['alertId'] = self.alert_id
+        if self.unique_key:
+            d['uniqueKey'] = self.unique_key
+        return d
+
+    def to_bytes(self):
+        return dumps_bytes(self.to_dict())
+
     def toJson(self):
-        d = dict(self.__dict__, **{
-            'alertId': self.alert_id,
-            'labels': list(map(lambda l: l.toDict(), self.labels)),
-            'uniqueKey': self.unique_key
-        })
-        return json.dumps({k: v for k, v in d.items() if v or k == 'type' or k == 'severity'}, default=str)
+        return dumps(self.to_dict())
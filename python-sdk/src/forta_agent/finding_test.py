@@ -0,0 +1,51 @@
+import json
+from datetime import datetime
+from .finding import Finding, FindingSeverity, FindingType
+from .label import Label, EntityType
+
+
+def create_finding():
+    return Finding({
+        'name': 'name',
+        'description': 'description',
+        'alert_id': 'ALERT-1',
+        'severity': FindingSeverity.High,
+        'type': FindingType.Exploit,
+        'metadata': {'key': 'value'},
+        'labels': [{'entity_type': EntityType.Address, 'entity': '0x123', 'confidence': 0.5, 'label': 'attacker'}],
+        'timestamp': datetime(2023, 1, 1),
+    })
+
+
+def test_finding_to_json():
+    finding = json.loads(create_finding().toJson())
+
+    assert finding == {
+        'name': 'name',
+        'description': 'description',
+        'alert_id': 'ALERT-1',
+        'alertId': 'ALERT-1',
+        'protocol': 'ethereum',
+        'severity': 4,
+        'type': 1,
+        'metadata': {'key': 'value'},
+        'labels': [{'entity_type': 1, 'entityType': 1, 'entity': '0x123', 'confidence': 0.5, 'label': 'attacker', 'remove': False, 'metadata': {}}],
+        'timestamp': '2023-01-01 00:00:00',
+    }
+
+
+def test_model_classes_have_no_instance_dict():
+    finding = create_finding()
+
+    assert not hasattr(finding, '__dict__')
+    assert not hasattr(finding.labels[0], '__dict__')
+    assert isinstance(finding.labels[0], Label)
+
+
+def test_finding_to_dict_matches_to_json():
+    finding = create_finding()
+    finding.metadata['amount'] = 2**200
+
+    assert finding.to_dict() == json.loads(finding.toJson())
+    assert json.loads(finding.to_bytes()) == json.loads(finding.toJson())
+    assert 'addresses' not in finding.to_dict()
@@ -0,0 +1,101 @@
+import os
+import gzip
+import requests
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from .serialization import dumps_bytes
+from .utils import get_settings
+
+DEFAULT_POOL_SIZE = 10
+DEFAULT_TIMEOUT_SECONDS = (10, 60)  # (connect, read)
+GZIP_MIN_BYTES = 1024  # smaller bodies are not worth compressing
+
+
+class FortaApiSession:
+    # keep-alive, connection pooled session shared by all Forta API calls (alerts, labels)
+    def __init__(self, pool_size=DEFAULT_POOL_SIZE, timeout=DEFAULT_TIMEOUT_SECONDS, gzip_requests=False):
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.gzip_requests = gzip_requests
+        self.session = None
+        self.pid = None
+        self.settings = None  # settings snapshot the session headers were taken from
+
+    def get_session(self):
+        # sockets must not be shared with forked processes (e.g. HandlerPool workers), so each process gets its own session
+        if self.session is None or self.pid != os.getpid():
+            session = requests.Session()
+            adapter = HTTPAdapter(
+                pool_connections=self.pool_size, pool_maxsize=self.pool_size)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            self.session = session
+            self.pid = os.getpid()
+            self.settings = None
+        # headers are taken from the settings snapshot again only after it is reloaded (see reload_settings)
+        settings = get_settings()
+        if self.settings is not settings:
+            if self.settings is not None:
+                for name in self.settings.forta_api_headers:
+                    self.session.headers.pop(name, None)
+            self.session.headers.update(settings.forta_api_headers)
+            self.settings = settings
+        return self.session
+
+    @property
+    def url(self):
+        return get_settings().forta_api_url
+
+    def post(self, payload):
+        session = self.get_session()
+        body = dumps_bytes(payload)
+        headers = None
+        if self.gzip_requests and len(body) >= GZIP_MIN_BYTES:
+            body = gzip.compress(body)
+            headers = {'content-encoding': 'gzip'}
+        return session.post(self.url, data=body, headers=headers, timeout=self.timeout)
+
+    def close(self):
+        if self.session is not None:
+            self.session.close()
+        self.session = None
+
+
+forta_api_session = None
+
+
+def get_forta_api_session():
+    global forta_api_session
+    if forta_api_session is None:
+        forta_api_session = FortaApiSession()
+    return forta_api_session
+
+
+def configure_forta_api_session(pool_size=DEFAULT_POOL_SIZE, timeout=DEFAULT_TIMEOUT_SECONDS, gzip_requests=False):
+    # replaces the shared session, e.g. configure_forta_api_session(pool_size=20, gzip_requests=True)
+    global forta_api_session
+    if forta_api_session is not None:
+        forta_api_session.close()
+    forta_api_session = FortaApiSession(pool_size, timeout, gzip_requests)
+    return forta_api_session
+
+
+def iter_pages(get_page, query, get_next_cursor):
+    # yields the pages of a paginated query, fetching the next page in the background while the
+    # current one is being handled (so at most 2 pages are held in memory at a time).
+    # get_next_cursor(page) returns the starting_cursor of the next page or None on the last page
+    executor = ThreadPoolExecutor(max_workers=1)
+    try:
+        next_page = executor.submit(get_page, query)
+        while next_page is not None:
+            page = next_page.result()
+            if page is None:
+                return
+            next_page = None
+            cursor = get_next_cursor(page)
+            if cursor is not None:
+                query = {**query, 'starting_cursor': cursor}
+                next_page = executor.submit(get_page, query)
+            yield page
+    finally:
+        executor.shutdown(wait=False)
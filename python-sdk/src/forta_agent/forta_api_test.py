@@ -0,0 +1,74 @@
+import gzip
+import json
+import pytest
+import responses
+from .utils import get_forta_api_url, reload_settings
+from .forta_api import FortaApiSession, GZIP_MIN_BYTES
+
+
+@pytest.fixture
+def settings_env(monkeypatch):
+    # environment variables are read into a settings snapshot, so reload it after changing them
+    yield monkeypatch
+    monkeypatch.undo()
+    reload_settings()
+
+
+@responses.activate
+def test_reuses_session_and_headers_across_requests(settings_env):
+    settings_env.setenv('FORTA_API_KEY', 'some-key')
+    reload_settings()
+    responses.add(responses.POST, get_forta_api_url(),
+                  json={'data': {}}, status=200)
+    api_session = FortaApiSession()
+
+    api_session.post({'query': 'a'})
+    session = api_session.session
+    api_session.post({'query': 'b'})
+
+    assert api_session.session is session
+    assert len(responses.calls) == 2
+    request = responses.calls[1].request
+    assert request.headers['Authorization'] == 'Bearer some-key'
+    assert request.headers['content-type'] == 'application/json'
+    assert json.loads(request.body) == {'query': 'b'}
+
+
+def test_picks_up_reloaded_settings(settings_env):
+    api_session = FortaApiSession()
+    api_session.get_session()
+    settings_env.setenv('FORTA_API_KEY', 'some-key')
+    settings_env.setenv('FORTA_PUBLIC_API_PROXY_HOST', 'proxy')
+    reload_settings()
+
+    with responses.RequestsMock() as mock:
+        mock.add(responses.POST, 'http://proxy/graphql',
+                 json={'data': {}}, status=200)
+        api_session.post({'query': 'a'})
+
+        assert mock.calls[0].request.headers['Authorization'] == 'Bearer some-key'
+
+
+@responses.activate
+def test_gzips_large_request_bodies_when_enabled():
+    responses.add(responses.POST, get_forta_api_url(),
+                  json={'data': {}}, status=200)
+    api_session = FortaApiSession(gzip_requests=True)
+    large_payload = {'query': 'a' * GZIP_MIN_BYTES}
+
+    api_session.post({'query': 'small'})
+    api_session.post(large_payload)
+
+    small_request, large_request = [call.request for call in responses.calls]
+    assert 'content-encoding' not in small_request.headers
+    assert large_request.headers['content-encoding'] == 'gzip'
+    assert json.loads(gzip.decompress(large_request.body)) == large_payload
+
+
+def test_creates_a_new_session_after_fork(monkeypatch):
+    api_session = FortaApiSession()
+    session = api_session.get_session()
+
+    monkeypatch.setattr(api_session, 'pid', -1)
+
+    assert api_session.get_session() is not session
@@ -0,0 +1,216 @@
+import os
+import inspect
+import traceback
+import multiprocessing
+from multiprocessing.connection import wait
+from .async_runner import AsyncRunner
+from .worker import Worker, INITIALIZE_METHOD_NAME, HANDLE_TRANSACTION_METHOD_NAME, HEALTH_CHECK_METHOD_NAME
+
+DEFAULT_MAX_PENDING_PER_WORKER = 16
+RESULT_POLL_INTERVAL_SECONDS = 1
+WORKER_EXIT_TIMEOUT_SECONDS = 1
+
+
+class HandlerPoolError(Exception):
+    pass
+
+
+def run_pool_worker(agent, lazy, task_queue, result_connection):
+    worker = Worker(agent, lazy)
+    while True:
+        task = task_queue.get()
+        if task is None:
+            return
+        task_id, msg_type, event = task
+        try:
+            if msg_type in (INITIALIZE_METHOD_NAME, HEALTH_CHECK_METHOD_NAME):
+                handler = getattr(agent, msg_type, None)
+                result = worker.call(
+                    handler) if handler is not None else None
+            else:
+                handler = getattr(agent, msg_type)
+                result = worker.call(
+                    handler, worker.event_factories[msg_type](event))
+            result_connection.send((task_id, None, result))
+        except Exception:
+            result_connection.send((task_id, traceback.format_exc(), None))
+
+
+class HandlerPool:
+    # runs bot handlers across forked worker processes (forked after initialize() so they share its state).
+    # An async initialize() instead runs in every worker on the event loop its handlers run on, so that what it
+    # creates on the loop (e.g. aiohttp sessions) stays usable
+    def __init__(self, agent, processes=None, max_pending_per_worker=DEFAULT_MAX_PENDING_PER_WORKER, lazy=False):
+        self.agent = agent
+        self.processes = processes if processes else os.cpu_count()
+        self.max_pending_per_worker = max_pending_per_worker
+        self.lazy = lazy
+        self.context = multiprocessing.get_context('fork')
+        self.workers = []
+        self.task_queues = []
+        self.result_connections = []
+        self.pending = []  # number of in-flight tasks per worker
+        self.next_task_id = 0
+
+    @property
+    def started(self):
+        return len(self.workers) > 0
+
+    def start(self):
+        # invokes the bot's initialize() (if any) before forking (or in each worker if it is async) and returns
+        # its response
+        if self.started:
+            raise HandlerPoolError("handler pool already started")
+        initialize = getattr(self.agent, INITIALIZE_METHOD_NAME, None)
+        initialize_in_workers = inspect.iscoroutinefunction(initialize)
+        initialize_response = None
+        if initialize is not None and not initialize_in_workers:
+            initialize_response = initialize()
+            if inspect.isawaitable(initialize_response):
+                runner = AsyncRunner()
+                try:
+                    initialize_response = runner.run(initialize_response)
+                finally:
+                    runner.close()
+        # each worker gets its own task queue and result pipe so a crashing worker
+        # cannot leave a lock shared with the other workers held
+        pipes = []
+        for _ in range(self.processes):
+            self.task_queues.append(self.context.Queue())
+            pipes.append(self.context.Pipe(duplex=False))
+        for worker_id, (result_reader, result_writer) in enumerate(pipes):
+            process = self.context.Process(target=run_pool_worker, args=(
+                self.agent, self.lazy, self.task_queues[worker_id], result_writer), daemon=True)
+            process.start()
+            self.workers.append(process)
+            self.result_connections.append(result_reader)
+            self.pending.append(0)
+        for _, result_writer in pipes:
+            result_writer.close()
+        if initialize_in_workers:
+            responses = [None] * self.processes
+            task_workers = {self.submit(worker_id, INITIALIZE_METHOD_NAME, None): worker_id
+                            for worker_id in range(self.processes)}
+            while task_workers:
+                self.collect_result(responses, task_workers)
+            initialize_response = responses[0]
+        return initialize_response
+
+    def close(self):
+        for worker_id, process in enumerate(self.workers):
+            if process.is_alive():
+                self.task_queues[worker_id].put(None)
+        for process in self.workers:
+            process.join()
+        for task_queue in self.task_queues:
+            task_queue.close()
+        for result_connection in self.result_connections:
+            result_connection.close()
+        self.workers = []
+        self.task_queues = []
+        self.result_connections = []
+        self.pending = []
+
+    def __enter__(self):
+        if not self.started:
+            self.start()
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def handle_transactions(self, events):
+        return self.handle(HANDLE_TRANSACTION_METHOD_NAME, events)
+
+    def handle(self, msg_type, events):
+        # returns a list of findings per event, in the same order as events
+        if not self.started:
+            self.start()
+        results = [None] * len(events)
+        task_indices = {}
+        for index, event in enumerate(events):
+            worker_id = self.get_available_worker(results, task_indices)
+            task_id = self.submit(worker_id, msg_type, event)
+            task_indices[task_id] = index
+        while task_indices:
+            self.collect_result(results, task_indices)
+        return results
+
+    def health_check(self):
+        # returns a list of error strings (prefixed with the worker id), or None if all workers are healthy
+        worker_errors = {}
+        task_workers = {}
+        for worker_id, process in enumerate(self.workers):
+            if not process.is_alive():
+                worker_errors[worker_id] = [
+                    f'process exited with code {process.exitcode}']
+                continue
+            task_id = self.submit(worker_id, HEALTH_CHECK_METHOD_NAME, None)
+            task_workers[task_id] = worker_id
+        results = {}
+        while task_workers:
+            try:
+                self.collect_result(results, task_workers)
+            except HandlerPoolError as e:
+                worker_errors.setdefault(-1, []).append(str(e))
+                # stop waiting on workers that died or closed their result pipe
+                task_workers = {task_id: worker_id for task_id, worker_id in task_workers.items()
+                                if self.workers[worker_id].is_alive() and self.pending[worker_id] > 0}
+        for worker_id, errors in results.items():
+            if errors:
+                worker_errors[worker_id] = list(errors)
+        errors = []
+        for worker_id in sorted(worker_errors):
+            prefix = f'worker {worker_id}: ' if worker_id >= 0 else ''
+            errors.extend(prefix + error for error in worker_errors[worker_id])
+        return errors if errors else None
+
+    def get_available_worker(self, results, task_indices):
+        # applies backpressure: waits for results while every worker is at its pending limit
+        while True:
+            worker_id = min(range(len(self.workers)),
+                            key=lambda i: self.pending[i])
+            if self.pending[worker_id] < self.max_pending_per_worker:
+                return worker_id
+            self.collect_result(results, task_indices)
+
+    def submit(self, worker_id, msg_type, event):
+        task_id = self.next_task_id
+        self.next_task_id += 1
+        self.pending[worker_id] += 1
+        self.task_queues[worker_id].put((task_id, msg_type, event))
+        return task_id
+
+    def collect_result(self, results, task_slots):
+        # blocks until a result for one of task_slots arrives and stores it in results[task_slots[task_id]]
+        while True:
+            ready = wait([connection for worker_id, connection in enumerate(self.result_connections)
+                          if self.pending[worker_id] > 0], RESULT_POLL_INTERVAL_SECONDS)
+            if not ready:
+                self.assert_workers_alive()
+                continue
+            worker_id = self.result_connections.index(ready[0])
+            try:
+                task_id, error, result = ready[0].recv()
+            except EOFError:
+                # the worker closed its result pipe (i.e. it is exiting), so none of its in-flight tasks complete
+                process = self.workers[worker_id]
+                process.join(WORKER_EXIT_TIMEOUT_SECONDS)
+                self.pending[worker_id] = 0
+                raise HandlerPoolError(f'worker {worker_id}: process exited with code {process.exitcode}'
+                                       if process.exitcode is not None else f'worker {worker_id}: result pipe closed')
+            self.pending[worker_id] -= 1
+            if task_id not in task_slots:
+                continue  # stale result of a previous call that raised
+            slot = task_slots.pop(task_id)
+            if error is not None:
+                raise HandlerPoolError(f'worker {worker_id}: {error}')
+            results[slot] = result
+            return
+
+    def assert_workers_alive(self):
+        for worker_id, process in enumerate(self.workers):
+            if self.pending[worker_id] > 0 and not process.is_alive():
+                self.pending[worker_id] = 0  # its in-flight tasks will never complete
+                raise HandlerPoolError(
+                    f'worker {worker_id}: process exited with code {process.exitcode}')
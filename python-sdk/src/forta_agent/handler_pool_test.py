@@ -0,0 +1,132 @@
+import os
+import time
+import signal
+import asyncio
+from types import SimpleNamespace
+import pytest
+from .finding import Finding, FindingSeverity, FindingType
+from .handler_pool import HandlerPool, HandlerPoolError
+
+state = {}
+
+
+def initialize():
+    state['threshold'] = 10
+    return {'alertConfig': {}}
+
+
+def handle_transaction(tx_event):
+    # later events finish first to make sure results are reordered
+    time.sleep(0.001 * (20 - int(tx_event.hash, 16)))
+    if tx_event.transaction.value < state['threshold']:
+        return []
+    return [Finding({'name': 'name', 'description': tx_event.hash, 'alert_id': 'ALERT-1',
+                     'severity': FindingSeverity.Low, 'type': FindingType.Info,
+                     'metadata': {'pid': os.getpid()}})]
+
+
+def health_check():
+    return [f'unhealthy {os.getpid()}'] if state.get('unhealthy') else []
+
+
+agent = SimpleNamespace(initialize=initialize,
+                        handle_transaction=handle_transaction, health_check=health_check)
+
+
+def create_events(count):
+    return [{'transaction': {'hash': hex(i), 'value': i}} for i in range(count)]
+
+
+def test_returns_findings_in_input_order_across_processes():
+    pool = HandlerPool(agent, processes=3, max_pending_per_worker=2)
+    with pool:
+        results = pool.handle_transactions(create_events(20))
+
+    assert len(results) == 20
+    assert all(findings == [] for findings in results[:10])
+    assert [findings[0].description for findings in results[10:]] == [
+        hex(i) for i in range(10, 20)]
+    assert len({findings[0].metadata['pid'] for findings in results[10:]}) > 1
+    assert not pool.started
+
+
+def test_start_calls_initialize_before_forking():
+    state.clear()
+    pool = HandlerPool(agent, processes=2)
+    try:
+        assert pool.start() == {'alertConfig': {}}
+        # workers inherited the initialized state
+        assert len(pool.handle_transactions(create_events(12))[11]) == 1
+        with pytest.raises(HandlerPoolError):
+            pool.start()
+    finally:
+        pool.close()
+
+
+def test_health_check_reports_per_worker_errors():
+    state['unhealthy'] = True
+    pool = HandlerPool(agent, processes=2)
+    try:
+        pool.start()
+        errors = pool.health_check()
+        assert len(errors) == 2
+        assert errors[0].startswith('worker 0: unhealthy')
+        assert errors[1].startswith('worker 1: unhealthy')
+
+        os.kill(pool.workers[1].pid, signal.SIGKILL)
+        pool.workers[1].join()
+        errors = pool.health_check()
+        assert 'worker 1: process exited' in errors[1]
+    finally:
+        state.pop('unhealthy')
+        pool.close()
+
+
+def test_runs_async_initialize_on_each_worker_loop():
+    async_state = {}
+
+    async def async_initialize():
+        async_state['loop'] = asyncio.get_event_loop()
+        return {'alertConfig': {'pid': os.getpid()}}
+
+    async def async_handle_transaction(tx_event):
+        # loop-bound state created by initialize belongs to the loop the handler runs on
+        return [asyncio.get_event_loop() is async_state['loop'] and os.getpid() != parent_pid]
+    parent_pid = os.getpid()
+    pool = HandlerPool(SimpleNamespace(initialize=async_initialize,
+                                       handle_transaction=async_handle_transaction), processes=2)
+    try:
+        response = pool.start()
+        results = pool.handle_transactions(create_events(4))
+    finally:
+        pool.close()
+
+    assert response['alertConfig']['pid'] != parent_pid
+    assert 'loop' not in async_state  # not run in the parent process
+    assert results == [[True]] * 4
+
+
+def test_raises_when_a_worker_closes_its_result_pipe():
+    pool = HandlerPool(agent, processes=2)
+    try:
+        pool.start()
+        reader, writer = pool.context.Pipe(duplex=False)
+        writer.close()
+        pool.result_connections[1] = reader
+        pool.pending[1] = 1
+
+        with pytest.raises(HandlerPoolError, match='worker 1: result pipe closed'):
+            pool.collect_result({}, {0: 0})
+        assert pool.pending[1] == 0
+    finally:
+        pool.close()
+
+
+def test_raises_handler_exceptions():
+    def failing_handle_transaction(tx_event):
+        raise ValueError('boom')
+    pool = HandlerPool(SimpleNamespace(
+        handle_transaction=failing_handle_transaction), processes=2)
+    with pool:
+        with pytest.raises(HandlerPoolError, match='boom'):
+            pool.handle_transactions(create_events(3))
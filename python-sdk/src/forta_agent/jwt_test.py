@@ -1,7 +1,41 @@
-from .jwt import MOCK_JWT, fetch_jwt
+from .jwt import MOCK_JWT, fetch_jwt, JwtVerifier, JwtTokenManager, MULTICALL3_CONTRACT, map_jwt_signers
 import responses
 import os
+import json
+import time
+import base64
+import threading
 import pytest
+from web3 import Web3
+from eth_account import Account
+from eth_abi import decode_abi, encode_abi
+
+POLYGON_URL = 'http://polygon.test'
+SCANNER_KEY = '0x' + '1' * 64
+BOT_ID = '0x' + 'ab' * 32
+
+
+def base64url(data):
+    return base64.urlsafe_b64encode(data).decode().rstrip('=')
+
+
+def create_signed_jwt(expires_at=None, key=SCANNER_KEY, sub=None):
+    header = base64url(json.dumps({'alg': 'ETH', 'typ': 'JWT'}).encode())
+    payload = base64url(json.dumps({'bot-id': BOT_ID, 'exp': expires_at if expires_at else int(time.time()) + 3600,
+                                    'sub': sub if sub else Account.from_key(key).address}).encode())
+    signature = Account.signHash(Web3.keccak(
+        text=f'{header}.{payload}'), key).signature
+    return f'{header}.{payload}.{base64url(bytes(signature))}'
+
+
+def add_are_they_linked_callback(linked, calls):
+    def callback(request):
+        body = json.loads(request.body)
+        calls.append(body['method'])
+        result = '0x1' if body['method'] == 'eth_chainId' else '0x' + \
+            ('1' if linked else '0').rjust(64, '0')
+        return (200, {}, json.dumps({'jsonrpc': '2.0', 'id': body['id'], 'result': result}))
+    responses.add_callback(responses.POST, POLYGON_URL, callback=callback)
 
 
 @responses.activate
@@ -57,3 +91,152 @@ def test_JWT_should_throw_exception():
         os.environ['NODE_ENV'] = 'production'
 
         token = fetch_jwt()
+
+
+@responses.activate
+def test_verifier_caches_verified_tokens_and_links():
+    calls = []
+    add_are_they_linked_callback(True, calls)
+    verifier = JwtVerifier(POLYGON_URL)
+    token = create_signed_jwt()
+    other_token = create_signed_jwt(int(time.time()) + 7200)
+
+    assert verifier.verify(token) == True
+    assert verifier.verify(token) == True
+    assert verifier.verify(other_token) == True
+
+    assert calls.count('eth_call') == 1
+    assert token in verifier.verified_tokens
+
+
+@responses.activate
+def test_verifier_rejects_invalid_tokens_without_caching_them():
+    calls = []
+    add_are_they_linked_callback(False, calls)
+    verifier = JwtVerifier(POLYGON_URL)
+    unlinked_token = create_signed_jwt()
+
+    assert verifier.verify(unlinked_token) == False
+    assert verifier.verify(create_signed_jwt(int(time.time()) - 10)) == False
+    assert verifier.verify(create_signed_jwt(sub='0x' + '2' * 40)) == False
+
+    assert calls.count('eth_call') == 1
+    assert verifier.verified_tokens == {}
+
+
+class FakeJwtProvider:
+    def __init__(self, lifetime_seconds=3600):
+        self.lifetime_seconds = lifetime_seconds
+        self.requests = []
+        self.release = threading.Event()
+        self.release.set()
+
+    def request_jwt(self, claims, expiresAt=None):
+        self.requests.append(claims)
+        self.release.wait(5)
+        # a distinct exp per request so that each token is different
+        return create_signed_jwt(int(time.time()) + self.lifetime_seconds + len(self.requests))
+
+
+def test_token_manager_caches_tokens_per_claims():
+    provider = FakeJwtProvider()
+    manager = JwtTokenManager(request_jwt=provider.request_jwt)
+
+    token = manager.get({'a': 1, 'b': 2})
+
+    assert manager.get({'b': 2, 'a': 1}) == token
+    assert manager.get({'a': 2}) != token
+    assert provider.requests == [{'a': 1, 'b': 2}, {'a': 2}]
+
+
+def test_token_manager_refreshes_tokens_close_to_expiry_in_background():
+    provider = FakeJwtProvider(lifetime_seconds=30)
+    manager = JwtTokenManager(
+        refresh_before_seconds=60, request_jwt=provider.request_jwt)
+    token = manager.get()
+    provider.release.clear()
+
+    assert manager.get() == token  # still valid, returned while refreshing
+    assert manager.get() == token
+    provider.release.set()
+    deadline = time.time() + 5
+    while manager.tokens[('{}', None)][0] == token and time.time() < deadline:
+        time.sleep(0.01)
+
+    assert len(provider.requests) == 2
+    assert manager.get() != token
+
+
+def test_token_manager_shares_in_flight_requests_and_skips_undecodable_tokens():
+    provider = FakeJwtProvider()
+    provider.release.clear()
+    manager = JwtTokenManager(request_jwt=provider.request_jwt)
+    tokens = []
+    threads = [threading.Thread(target=lambda: tokens.append(
+        manager.get({'a': 1}))) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.1)
+    provider.release.set()
+    for thread in threads:
+        thread.join()
+
+    assert len(provider.requests) == 1
+    assert len(set(tokens)) == 1
+
+    undecodable_manager = JwtTokenManager(
+        request_jwt=lambda claims, expiresAt: 'testJWT')
+    assert undecodable_manager.get() == 'testJWT'
+    assert undecodable_manager.tokens == {}
+
+
+def add_multicall_callback(linked_scanners, calls):
+    # answers aggregate3 calls of areTheyLinked(agentId, scannerId) with whether the scanner is in linked_scanners
+    def callback(request):
+        body = json.loads(request.body)
+        if body['method'] == 'eth_chainId':
+            return (200, {}, json.dumps({'jsonrpc': '2.0', 'id': body['id'], 'result': '0x1'}))
+        assert body['params'][0]['to'].lower() == MULTICALL3_CONTRACT.lower()
+        (call3s,) = decode_abi(['(address,bool,bytes)[]'],
+                               bytes.fromhex(body['params'][0]['data'][10:]))
+        calls.append(call3s)
+        results = []
+        for _, _, call_data in call3s:
+            _, scanner_id = decode_abi(['uint256', 'uint256'], call_data[4:])
+            results.append(
+                (True, encode_abi(['bool'], [scanner_id in linked_scanners])))
+        result = encode_abi(['(bool,bytes)[]'], [results])
+        return (200, {}, json.dumps({'jsonrpc': '2.0', 'id': body['id'], 'result': '0x' + result.hex()}))
+    responses.add_callback(responses.POST, POLYGON_URL, callback=callback)
+
+
+@responses.activate
+def test_verify_many_dedupes_tokens_and_checks_links_in_one_multicall():
+    other_key = '0x' + '2' * 64
+    calls = []
+    add_multicall_callback(
+        {int(Account.from_key(SCANNER_KEY).address, 16)}, calls)
+    verifier = JwtVerifier(POLYGON_URL)
+    token = create_signed_jwt()
+    other_token = create_signed_jwt(int(time.time()) + 7200)
+    unlinked_token = create_signed_jwt(key=other_key)
+    expired_token = create_signed_jwt(int(time.time()) - 10)
+
+    verdicts = verifier.verify_many(
+        [token, unlinked_token, token, other_token, expired_token, 'not-a-jwt'], processes=1)
+
+    assert verdicts == [True, False, True, True, False, False]
+    assert len(calls) == 1
+    assert len(calls[0]) == 2  # one call per unique (bot id, scanner) pair
+    assert verifier.verify_many([token, unlinked_token]) == [True, False]
+    assert len(calls) == 1  # verified token and memoized link
+
+
+def test_verify_many_recovers_signers_across_processes():
+    tokens = [create_signed_jwt(int(time.time()) + 3600 + i)
+              for i in range(64)]
+
+    signers = map_jwt_signers(tokens, processes=2)
+
+    assert [signer[1] for signer in signers] == [
+        Account.from_key(SCANNER_KEY).address] * 64
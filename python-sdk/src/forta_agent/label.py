@@ -11,11 +11,16 @@ class EntityType(IntEnum):
 
 
 class Label:
+    __slots__ = ('entity_type', 'entity', 'confidence', 'label', 'remove',
+                 'unique_key', 'metadata', 'id', 'source', 'created_at',
+                 'embedding')
+
     def __init__(self, dict):
         entityTypeVal = dict.get('entity_type', dict.get('entityType'))
         self.entity_type = EntityType[entityTypeVal.title()] if type(
             entityTypeVal) == str else EntityType(entityTypeVal)
-        assert_enum_value_in_dict(self.__dict__, 'entity_type', EntityType)
+        assert_enum_value_in_dict(
+            {'entity_type': self.entity_type}, 'entity_type', EntityType)
         assert_non_empty_string_in_dict(dict, 'entity')
         self.entity = dict['entity']
         self.confidence = dict['confidence']
@@ -34,7 +39,7 @@ class Label:
         self.embedding = dict.get('embedding')
 
     def toDict(self):
-        d = dict(self.__dict__, **{
+        d = dict({k: getattr(self, k) for k in self.__slots__}, **{
             'entityType': self.entity_type,
             'uniqueKey': self.unique_key,
         })
@@ -53,6 +58,8 @@ class Label:
 
 
 class LabelSource:
+    __slots__ = ('alert_hash', 'alert_id', 'bot', 'chain_id', 'id')
+
     def __init__(self, dict):
         self.alert_hash = dict.get('alertHash')
         self.alert_id = dict.get('alertId')
@@ -63,6 +70,8 @@ class LabelSource:
 
 
 class LabelSourceBot:
+    __slots__ = ('id', 'image', 'image_hash', 'manifest')
+
     def __init__(self, dict):
         self.id = dict.get('id')
         self.image = dict.get('image')
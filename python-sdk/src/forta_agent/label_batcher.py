@@ -0,0 +1,98 @@
+import threading
+from concurrent.futures import Future
+from .labels_api import LabelsResponse, iter_labels
+from .label_cache import LABEL_QUERY_KEYS, get_hashable
+
+DEFAULT_WINDOW_SECONDS = 0.02
+DEFAULT_MAX_ENTITIES = 500
+
+
+class LabelBatcher:
+    # coalesces the entity lookups of many callers into a single labels query per set of query options.
+    # Requests are sent when window_seconds have passed since the first pending request, when max_entities are
+    # pending, or when flush() is called. With window_seconds=None, requests are only sent by flush(), e.g.
+    # once per block:
+    #
+    #   with batcher:  # flushes on exit
+    #       futures = [batcher.request([tx_event.from_]) for tx_event in tx_events]
+    #   labels = [future.result() for future in futures]
+    def __init__(self, window_seconds=DEFAULT_WINDOW_SECONDS, max_entities=DEFAULT_MAX_ENTITIES, fetch_labels=None):
+        self.window_seconds = window_seconds
+        self.max_entities = max_entities
+        self.fetch_labels = fetch_labels if fetch_labels is not None else lambda query: list(
+            iter_labels(query))
+        self.lock = threading.Lock()
+        self.pending = {}  # query key -> (query options, [(entities, future), ...])
+        self.pending_entities = 0
+        self.timer = None
+        self.queries_sent = 0
+        self.requests_received = 0
+
+    def request(self, entities, dict=None):
+        # returns a Future of the list of labels of the given entities (for the query options in dict)
+        dict = dict if dict is not None else {}
+        future = Future()
+        query_key = tuple(get_hashable(dict.get(key))
+                          for key in LABEL_QUERY_KEYS)
+        with self.lock:
+            self.requests_received += 1
+            _, requests = self.pending.setdefault(query_key, (dict, []))
+            requests.append((list(entities), future))
+            self.pending_entities += len(entities)
+            full = self.pending_entities >= self.max_entities
+            if not full and self.timer is None and self.window_seconds is not None:
+                self.timer = threading.Timer(self.window_seconds, self.flush)
+                self.timer.daemon = True
+                self.timer.start()
+        if full:
+            self.flush()
+        return future
+
+    def get_labels(self, dict):
+        # blocking equivalent of get_labels({'entities': [...], ...}) that shares its query with other callers
+        # (page_info of the response is None). Without a window nothing else would send the request, so it is
+        # flushed right away together with the other pending requests
+        response = LabelsResponse({})
+        future = self.request(dict.get('entities', []), dict)
+        if self.window_seconds is None:
+            self.flush()
+        response.labels = future.result()
+        return response
+
+    def flush(self):
+        with self.lock:
+            pending = self.pending
+            self.pending = {}
+            self.pending_entities = 0
+            if self.timer is not None:
+                self.timer.cancel()
+                self.timer = None
+        for dict, requests in pending.values():
+            self.send(dict, requests)
+
+    def send(self, dict, requests):
+        unique_entities = {}  # in request order
+        for request_entities, _ in requests:
+            for entity in request_entities:
+                unique_entities.setdefault(entity.lower(), entity)
+        entities = list(unique_entities.values())
+        try:
+            labels = self.fetch_labels({**dict, 'entities': entities})
+        except Exception as e:
+            for _, future in requests:
+                future.set_exception(e)
+            return
+        finally:
+            self.queries_sent += 1
+        labels_by_entity = {}
+        for label in labels:
+            labels_by_entity.setdefault(label.entity.lower(), []).append(label)
+        for request_entities, future in requests:
+            future.set_result([label for entity in request_entities
+                               for label in labels_by_entity.get(entity.lower(), [])])
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.flush()
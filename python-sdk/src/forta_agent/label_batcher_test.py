@@ -0,0 +1,78 @@
+import threading
+from unittest.mock import call
+import pytest
+from .label_batcher import LabelBatcher
+
+
+def test_coalesces_requests_until_flush_and_splits_results(create_label, mock_fetch_labels):
+    fetch_labels = mock_fetch_labels([create_label('0xa'), create_label('0xb'),
+                                      create_label('0xb', 'phishing')])
+    batcher = LabelBatcher(window_seconds=None, fetch_labels=fetch_labels)
+
+    with batcher:
+        first = batcher.request(['0xa', '0xc'])
+        second = batcher.request(['0xB', '0xA'])
+        assert not first.done()
+
+    assert [label.label for label in first.result()] == ['scammer']
+    assert [(label.entity, label.label) for label in second.result()] == [
+        ('0xb', 'scammer'), ('0xb', 'phishing'), ('0xa', 'scammer')]
+    assert fetch_labels.call_args_list == [call({'entities': ['0xa', '0xc', '0xB']})]
+
+
+def test_get_labels_without_window_flushes_instead_of_blocking(create_label, mock_fetch_labels):
+    fetch_labels = mock_fetch_labels([create_label('0xa')])
+    batcher = LabelBatcher(window_seconds=None, fetch_labels=fetch_labels)
+    pending = batcher.request(['0xb'])
+
+    response = batcher.get_labels({'entities': ['0xa']})
+
+    assert [label.entity for label in response.labels] == ['0xa']
+    assert pending.done()
+    assert fetch_labels.call_args_list == [call({'entities': ['0xb', '0xa']})]
+
+
+def test_sends_one_query_per_set_of_query_options(mock_fetch_labels):
+    fetch_labels = mock_fetch_labels([])
+    batcher = LabelBatcher(window_seconds=None, fetch_labels=fetch_labels)
+
+    batcher.request(['0xa'], {'source_ids': ['0xbot']})
+    batcher.request(['0xb'], {'source_ids': ['0xbot']})
+    batcher.request(['0xc'])
+    batcher.flush()
+
+    assert sorted(args[0]['entities'] for args, _ in fetch_labels.call_args_list) == [
+        ['0xa', '0xb'], ['0xc']]
+
+
+def test_flushes_after_window_for_concurrent_callers(create_label, mock_fetch_labels):
+    fetch_labels = mock_fetch_labels([create_label(f'0x{i}') for i in range(10)])
+    batcher = LabelBatcher(window_seconds=0.05, fetch_labels=fetch_labels)
+    results = [None] * 10
+
+    def lookup(i):
+        results[i] = batcher.get_labels({'entities': [f'0x{i}']}).labels
+    threads = [threading.Thread(target=lookup, args=(i,)) for i in range(10)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert [[label.entity for label in labels] for labels in results] == [
+        [f'0x{i}'] for i in range(10)]
+    assert fetch_labels.call_count < 10
+
+
+def test_flushes_when_max_entities_are_pending_and_propagates_errors():
+    def fetch_labels(query):
+        raise Exception('api error')
+    batcher = LabelBatcher(window_seconds=None, max_entities=2,
+                           fetch_labels=fetch_labels)
+
+    first = batcher.request(['0xa'])
+    second = batcher.request(['0xb'])
+
+    with pytest.raises(Exception, match='api error'):
+        first.result(timeout=1)
+    with pytest.raises(Exception, match='api error'):
+        second.result(timeout=1)
@@ -0,0 +1,121 @@
+import time
+import threading
+from collections import OrderedDict
+from .labels_api import LabelsResponse, get_labels, iter_labels
+
+DEFAULT_TTL_SECONDS = 300
+DEFAULT_NEGATIVE_TTL_SECONDS = 60
+DEFAULT_MAX_LABELS = 100000
+# query options (other than entities) that select which labels are returned for an entity
+LABEL_QUERY_KEYS = ('labels', 'source_ids', 'entity_type',
+                    'state', 'created_since', 'created_before')
+
+
+class LabelCache:
+    # TTL + LRU cache of the labels of each entity, in front of get_labels. The cache holds at most max_labels
+    # labels (entities without labels count as one), evicting the least recently used entities first.
+    # Entities without labels are cached too, for negative_ttl_seconds
+    def __init__(self, ttl_seconds=DEFAULT_TTL_SECONDS, negative_ttl_seconds=DEFAULT_NEGATIVE_TTL_SECONDS,
+                 max_labels=DEFAULT_MAX_LABELS, fetch_labels=None):
+        self.ttl_seconds = ttl_seconds
+        self.negative_ttl_seconds = negative_ttl_seconds
+        self.max_labels = max_labels
+        self.fetch_labels = fetch_labels if fetch_labels is not None else lambda query: list(
+            iter_labels(query))
+        self.entries = OrderedDict()  # key -> (expires_at, labels)
+        self.size = 0
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.negative_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get_labels(self, dict):
+        # same as labels_api.get_labels, but all labels of the queried entities are returned in a single response
+        # (page_info is None). Queries without entities or with a starting_cursor are not cached
+        entities = dict.get('entities')
+        if not entities or dict.get('starting_cursor') is not None:
+            return get_labels(dict)
+        labels_by_entity = self.get_many(dict, entities)
+        response = LabelsResponse({})
+        response.labels = [
+            label for entity in entities for label in labels_by_entity[entity]]
+        return response
+
+    def get_many(self, dict, entities):
+        # returns {entity: [Label, ...]} for the given entities, fetching the ones not in cache with a single query
+        query_key = tuple(get_hashable(dict.get(key))
+                          for key in LABEL_QUERY_KEYS)
+        labels_by_entity = {}
+        missing = []
+        now = time.monotonic()
+        with self.lock:
+            for entity in entities:
+                key = (entity.lower(), query_key)
+                entry = self.entries.get(key)
+                if entry is not None and entry[0] > now:
+                    self.entries.move_to_end(key)
+                    labels_by_entity[entity] = entry[1]
+                    if entry[1]:
+                        self.hits += 1
+                    else:
+                        self.negative_hits += 1
+                else:
+                    self.misses += 1
+                    missing.append(entity)
+        if missing:
+            fetched = {entity.lower(): [] for entity in missing}
+            for label in self.fetch_labels({**dict, 'entities': missing}):
+                fetched.setdefault(label.entity.lower(), []).append(label)
+            with self.lock:
+                for entity in missing:
+                    labels = fetched[entity.lower()]
+                    labels_by_entity[entity] = labels
+                    self.put((entity.lower(), query_key), labels)
+        return labels_by_entity
+
+    def put(self, key, labels):
+        ttl_seconds = self.ttl_seconds if labels else self.negative_ttl_seconds
+        old_entry = self.entries.pop(key, None)
+        if old_entry is not None:
+            self.size -= get_weight(old_entry[1])
+        self.entries[key] = (time.monotonic() + ttl_seconds, labels)
+        self.size += get_weight(labels)
+        while self.size > self.max_labels and len(self.entries) > 1:
+            _, (_, evicted_labels) = self.entries.popitem(last=False)
+            self.size -= get_weight(evicted_labels)
+            self.evictions += 1
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.size = 0
+
+    def stats(self):
+        return {'hits': self.hits, 'negative_hits': self.negative_hits, 'misses': self.misses,
+                'evictions': self.evictions, 'entities': len(self.entries), 'labels': self.size}
+
+
+def get_weight(labels):
+    return max(1, len(labels))
+
+
+def get_hashable(value):
+    if isinstance(value, list):
+        return tuple(get_hashable(v) for v in value)
+    return value
+
+
+label_cache = None
+
+
+def get_label_cache():
+    global label_cache
+    if label_cache is None:
+        label_cache = LabelCache()
+    return label_cache
+
+
+def get_labels_cached(dict):
+    # drop-in replacement for get_labels({'entities': [...], ...}) backed by the shared LabelCache
+    return get_label_cache().get_labels(dict)
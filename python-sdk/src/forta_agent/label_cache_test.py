@@ -0,0 +1,56 @@
+from unittest.mock import call
+from .label_cache import LabelCache
+
+
+def test_caches_labels_and_entities_without_labels(create_label, mock_fetch_labels):
+    fetch_labels = mock_fetch_labels([create_label('0xa'), create_label('0xa', 'phishing')])
+    cache = LabelCache(fetch_labels=fetch_labels)
+
+    first = cache.get_labels({'entities': ['0xa', '0xb']})
+    second = cache.get_labels({'entities': ['0xb', '0xA']})
+
+    assert [label.label for label in first.labels] == ['scammer', 'phishing']
+    assert [label.label for label in second.labels] == ['scammer', 'phishing']
+    assert fetch_labels.call_args_list == [call({'entities': ['0xa', '0xb']})]
+    assert cache.stats() == {'hits': 1, 'negative_hits': 1, 'misses': 2,
+                             'evictions': 0, 'entities': 2, 'labels': 3}
+
+
+def test_only_fetches_missing_entities_and_keys_on_query_options(create_label, mock_fetch_labels):
+    fetch_labels = mock_fetch_labels([create_label('0xa'), create_label('0xb')])
+    cache = LabelCache(fetch_labels=fetch_labels)
+
+    cache.get_labels({'entities': ['0xa']})
+    cache.get_labels({'entities': ['0xa', '0xb']})
+    cache.get_labels({'entities': ['0xa'], 'source_ids': ['0xbot']})
+
+    assert [args[0]['entities'] for args, _ in fetch_labels.call_args_list] == [
+        ['0xa'], ['0xb'], ['0xa']]
+
+
+def test_expires_entries_after_ttl(create_label, mock_fetch_labels):
+    fetch_labels = mock_fetch_labels([create_label('0xa')])
+    cache = LabelCache(ttl_seconds=0, negative_ttl_seconds=0,
+                       fetch_labels=fetch_labels)
+
+    cache.get_labels({'entities': ['0xa', '0xb']})
+    cache.get_labels({'entities': ['0xa', '0xb']})
+
+    assert fetch_labels.call_count == 2
+    assert cache.stats()['misses'] == 4
+
+
+def test_evicts_least_recently_used_entities_over_label_cap(create_label, mock_fetch_labels):
+    fetch_labels = mock_fetch_labels([create_label('0xa'), create_label('0xa', 'phishing'),
+                                      create_label('0xb'), create_label('0xc')])
+    cache = LabelCache(max_labels=3, fetch_labels=fetch_labels)
+
+    cache.get_labels({'entities': ['0xa']})
+    cache.get_labels({'entities': ['0xb']})
+    cache.get_labels({'entities': ['0xa']})  # 0xb is now least recently used
+    cache.get_labels({'entities': ['0xc']})
+
+    assert cache.stats()['evictions'] == 1
+    assert cache.stats()['labels'] == 3
+    cache.get_labels({'entities': ['0xa', '0xc']})
+    assert fetch_labels.call_count == 3
@@ -1,16 +1,12 @@
-import requests
 from .label import Label
-from .utils import get_forta_api_headers, get_forta_api_url
+from .forta_api import get_forta_api_session, iter_pages
 
 
 def get_labels(dict):
-    forta_api_url = get_forta_api_url()
-    headers = get_forta_api_headers()
     query_options = LabelQueryOptions(dict)
     payload = query_options.get_query()
 
-    response = requests.request(
-        "POST", forta_api_url, json=payload, headers=headers)
+    response = get_forta_api_session().post(payload)
 
     if response.status_code != 200:
         raise Exception(response.text)
@@ -24,6 +20,23 @@ def get_labels(dict):
     return LabelsResponse(data.get('labels'))
 
 
+def iter_labels(dict):
+    # yields the labels of every page of the query (see get_labels), prefetching the next page in the background
+    for page in iter_labels_pages(dict):
+        yield from page.labels
+
+
+def iter_labels_pages(dict):
+    return iter_pages(get_labels, dict, get_next_labels_cursor)
+
+
+def get_next_labels_cursor(labels_response):
+    page_info = labels_response.page_info
+    if page_info is None or not page_info.has_next_page or page_info.end_cursor is None:
+        return None
+    return page_info.end_cursor
+
+
 class LabelQueryOptions:
     def __init__(self, dict):
         self.entities = dict.get('entities')
@@ -1,8 +1,9 @@
+import json
 import responses
 import pytest
 from .utils import get_forta_api_url, get_forta_api_headers
 from .label import Label, EntityType
-from .labels_api import get_labels
+from .labels_api import get_labels, iter_labels
 
 mock_label = {
     "createdAt": "2023-05-16T07:43:36.007844434Z",
@@ -84,3 +85,19 @@ def test_invokes_api_and_returns_parsed_labels():
     assert label.created_at == mock_label["createdAt"]
     assert label.source.chain_id == mock_label["source"]["chainId"]
     assert label.source.alert_hash == mock_label["source"]["alertHash"]
+
+
+@responses.activate
+def test_iter_labels_follows_cursors_across_pages():
+    responses.add(responses.POST, get_forta_api_url(), json={"data": {"labels": {"pageInfo": {
+        "hasNextPage": True, "endCursor": {"pageToken": "page-2"}}, "labels": [mock_label, mock_label]}}})
+    responses.add(responses.POST, get_forta_api_url(), json={"data": {"labels": {"pageInfo": {
+        "hasNextPage": False}, "labels": [mock_label]}}})
+
+    labels = list(iter_labels({"entities": ["0xaddress"]}))
+
+    assert len(labels) == 3
+    assert all(isinstance(label, Label) for label in labels)
+    requests = [json.loads(call.request.body) for call in responses.calls]
+    assert "after" not in requests[0]["variables"]["input"]
+    assert requests[1]["variables"]["input"]["after"] == {"pageToken": "page-2"}
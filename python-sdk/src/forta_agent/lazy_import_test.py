@@ -0,0 +1,57 @@
+import sys
+import time
+import subprocess
+import pytest
+import forta_agent
+
+
+@pytest.mark.skipif(sys.version_info < (3, 7), reason='python < 3.7 imports every submodule upfront')
+def test_finding_import_does_not_import_web3():
+    script = ('import sys; from forta_agent import Finding, FindingSeverity, FindingType; '
+              'print(sorted(m for m in ("web3", "requests", "jsonc_parser") if m in sys.modules))')
+
+    process = subprocess.run([sys.executable, '-c', script],
+                             stdout=subprocess.PIPE, check=True)
+
+    assert process.stdout.decode().strip() == '[]'
+
+
+def test_lazy_attributes_resolve_to_submodule_objects():
+    from .finding import Finding
+    from .utils import get_web3_provider
+
+    assert forta_agent.Finding is Finding
+    assert get_web3_provider() is forta_agent.web3Provider
+    assert 'HandlerPool' in dir(forta_agent)
+    with pytest.raises(AttributeError):
+        forta_agent.missing_attribute
+
+
+def test_star_import_includes_public_names():
+    script = ('from forta_agent import *; names = dir(); '
+              'print(all(name in names for name in ("Finding", "get_labels", "Web3")))')
+
+    process = subprocess.run([sys.executable, '-c', script],
+                             stdout=subprocess.PIPE, check=True)
+
+    assert process.stdout.decode().strip() == 'True'
+
+
+def test_creates_default_web3_provider_once_across_threads(monkeypatch):
+    from concurrent.futures import ThreadPoolExecutor
+    from . import web3_provider
+    created = []
+
+    def create_web3_provider():
+        time.sleep(0.05)
+        created.append(object())
+        return created[-1]
+    monkeypatch.delitem(vars(forta_agent), 'web3Provider', raising=False)
+    monkeypatch.setattr(web3_provider, 'create_web3_provider', create_web3_provider)
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        providers = list(executor.map(
+            lambda _: forta_agent.web3Provider, range(4)))
+
+    assert len(created) == 1
+    assert all(provider is created[0] for provider in providers)
@@ -23,6 +23,10 @@ class Receipt:
 
 
 class Log:
+    __slots__ = ('address', 'topics', 'data', 'log_index', 'block_number',
+                 'block_hash', 'transaction_index', 'transaction_hash',
+                 'removed')
+
     def __init__(self, dict):
         self.address = dict.get('address')
         self.topics = dict.get('topics', [])
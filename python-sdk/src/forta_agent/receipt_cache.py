@@ -0,0 +1,126 @@
+import threading
+import requests
+from collections import OrderedDict
+from .utils import get_web3_provider, format_json_rpc_receipt
+
+DEFAULT_MAX_RECEIPTS = 10000
+METHOD_NOT_FOUND_ERROR_CODE = -32601
+
+
+class ReceiptCache:
+    # LRU cache of Receipt by (lowercase) transaction hash, filled a block at a time by prefetch_block
+    def __init__(self, max_receipts=DEFAULT_MAX_RECEIPTS):
+        self.max_receipts = max_receipts
+        self.receipts = OrderedDict()
+        self.lock = threading.Lock()
+        self.block_receipts_supported = None  # whether the node supports eth_getBlockReceipts
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, tx_hash):
+        key = tx_hash.lower() if isinstance(tx_hash, str) else tx_hash.hex()
+        with self.lock:
+            receipt = self.receipts.get(key)
+            if receipt is None:
+                self.misses += 1
+                return None
+            self.receipts.move_to_end(key)
+            self.hits += 1
+            return receipt
+
+    def put(self, receipt):
+        with self.lock:
+            self.receipts[receipt.transaction_hash.lower()] = receipt
+            self.receipts.move_to_end(receipt.transaction_hash.lower())
+            while len(self.receipts) > self.max_receipts:
+                self.receipts.popitem(last=False)
+
+    def prefetch_block(self, block):
+        # fetches the receipts of all transactions of a block (number, hash or tag like 'latest') in one round trip
+        # with eth_getBlockReceipts, or with a batch of eth_getTransactionReceipt requests if the node does not
+        # support it, and caches them. Returns the list of Receipt in transaction order
+        from .receipt import Receipt  # avoid circular import
+        block_id = hex(block) if isinstance(block, int) else block
+        raw_receipts = None
+        if self.block_receipts_supported is not False:
+            # only a "method not found" error disables eth_getBlockReceipts, other failures (e.g. a block the
+            # node has not indexed yet) fall back to batch requests for this block only
+            raw_receipts, self.block_receipts_supported = get_block_receipts(
+                block_id)
+        if raw_receipts is None:
+            raw_receipts = get_block_receipts_batch(block_id)
+        receipts = [Receipt(format_json_rpc_receipt(raw_receipt))
+                    for raw_receipt in raw_receipts]
+        for receipt in receipts:
+            self.put(receipt)
+        return receipts
+
+    def clear(self):
+        with self.lock:
+            self.receipts.clear()
+
+
+def get_block_receipts(block_id):
+    # returns (raw receipts of the block or None if they could not be fetched, whether eth_getBlockReceipts
+    # is supported by the node)
+    provider = get_web3_provider().provider
+    try:
+        response = provider.make_request('eth_getBlockReceipts', [block_id])
+    except requests.HTTPError as e:
+        # some nodes respond to unknown methods with an http error status and a json-rpc error body
+        try:
+            response = e.response.json()
+        except ValueError:
+            return None, True
+        return None, not is_method_not_found(response)
+    if 'error' in response or response.get('result') is None:
+        return None, not is_method_not_found(response)
+    return response['result'], True
+
+
+def is_method_not_found(response):
+    error = response.get('error') if isinstance(response, dict) else None
+    return isinstance(error, dict) and error.get('code') == METHOD_NOT_FOUND_ERROR_CODE
+
+
+def get_block_receipts_batch(block_id):
+    provider = get_web3_provider().provider
+    is_block_hash = isinstance(block_id, str) and len(block_id) == 66
+    response = provider.make_request('eth_getBlockByHash' if is_block_hash else 'eth_getBlockByNumber',
+                                     [block_id, False])
+    if 'error' in response:
+        raise Exception(response['error'])
+    if response.get('result') is None:
+        raise Exception(f'block {block_id} not found')
+    tx_hashes = response['result'].get('transactions', [])
+    if not tx_hashes:
+        return []
+    batch = [('eth_getTransactionReceipt', [tx_hash]) for tx_hash in tx_hashes]
+    if hasattr(provider, 'make_batch_request'):
+        responses = provider.make_batch_request(batch)
+    else:  # e.g. a provider set up by the bot itself
+        responses = [provider.make_request(method, params) for method, params in batch]
+    raw_receipts = []
+    for tx_hash, response in zip(tx_hashes, responses):
+        if response is None:
+            raise Exception(f'no receipt response for {tx_hash}')
+        if 'error' in response:
+            raise Exception(response['error'])
+        raw_receipts.append(response['result'])
+    return raw_receipts
+
+
+receipt_cache = None
+
+
+def get_receipt_cache():
+    global receipt_cache
+    if receipt_cache is None:
+        receipt_cache = ReceiptCache()
+    return receipt_cache
+
+
+def prefetch_block_receipts(block):
+    # e.g. prefetch_block_receipts(block_event.block_number) at the start of handle_block, after which
+    # get_transaction_receipt is served from memory for the transactions of the block
+    return get_receipt_cache().prefetch_block(block)
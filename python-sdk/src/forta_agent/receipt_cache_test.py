@@ -0,0 +1,100 @@
+import json
+import responses
+from .utils import get_json_rpc_url, get_transaction_receipt
+from .receipt import Receipt
+from .receipt_cache import ReceiptCache, get_receipt_cache, prefetch_block_receipts
+
+BLOCK_HASH = '0x' + 'b' * 64
+
+
+def create_raw_receipt(index):
+    tx_hash = '0x' + str(index) * 64
+    return {
+        'status': '0x1', 'gasUsed': '0x5208', 'cumulativeGasUsed': hex(21000 * (index + 1)), 'logsBloom': '0x00',
+        'contractAddress': None, 'blockNumber': '0x10', 'blockHash': BLOCK_HASH, 'transactionIndex': hex(index),
+        'transactionHash': tx_hash, 'logs': [{
+            'address': '0xABC', 'topics': ['0x01'], 'data': '0x', 'logIndex': hex(index), 'blockNumber': '0x10',
+            'blockHash': BLOCK_HASH, 'transactionIndex': hex(index), 'transactionHash': tx_hash, 'removed': False}],
+    }
+
+
+def add_json_rpc_callback(supports_block_receipts, calls):
+    def callback(request):
+        body = json.loads(request.body)
+        calls.append(body)
+        if isinstance(body, list):
+            return (200, {}, json.dumps([{'jsonrpc': '2.0', 'id': r['id'], 'result': create_raw_receipt(
+                int(r['params'][0][2]))} for r in reversed(body)]))
+        if body['method'] == 'eth_getBlockReceipts':
+            if supports_block_receipts is None:  # e.g. a block the node has not indexed yet
+                return (200, {}, json.dumps({'jsonrpc': '2.0', 'id': body['id'], 'result': None}))
+            if not supports_block_receipts:
+                return (200, {}, json.dumps({'jsonrpc': '2.0', 'id': body['id'], 'error': {'code': -32601, 'message': 'method not found'}}))
+            return (200, {}, json.dumps({'jsonrpc': '2.0', 'id': body['id'], 'result': [create_raw_receipt(i) for i in range(3)]}))
+        if body['method'] == 'eth_getBlockByNumber':
+            return (200, {}, json.dumps({'jsonrpc': '2.0', 'id': body['id'], 'result': {
+                'transactions': ['0x' + str(i) * 64 for i in range(3)]}}))
+        raise Exception(f'unexpected method {body["method"]}')
+    responses.add_callback(responses.POST, get_json_rpc_url(), callback=callback)
+
+
+@responses.activate
+def test_prefetches_block_receipts_and_serves_get_transaction_receipt_from_cache():
+    calls = []
+    add_json_rpc_callback(True, calls)
+    get_receipt_cache().clear()
+
+    receipts = prefetch_block_receipts(16)
+    receipt = get_transaction_receipt('0x' + '1' * 64)
+
+    assert [r.transaction_index for r in receipts] == [0, 1, 2]
+    assert [call['method'] for call in calls] == ['eth_getBlockReceipts']
+    assert calls[0]['params'] == ['0x10']
+    assert receipt is receipts[1]
+    assert receipt.status == True
+    assert receipt.gas_used == 21000
+    assert receipt.logs[0].address == '0xabc'
+    assert receipt.logs[0].log_index == 1
+    get_receipt_cache().clear()
+
+
+@responses.activate
+def test_keeps_using_block_receipts_after_a_transient_failure():
+    calls = []
+    add_json_rpc_callback(None, calls)
+    cache = ReceiptCache()
+
+    receipts = cache.prefetch_block(16)
+    cache.prefetch_block(16)
+
+    assert len(receipts) == 3
+    methods = [call['method'] if isinstance(call, dict) else 'batch' for call in calls]
+    assert methods == ['eth_getBlockReceipts', 'eth_getBlockByNumber', 'batch',
+                       'eth_getBlockReceipts', 'eth_getBlockByNumber', 'batch']
+    assert cache.block_receipts_supported is True
+
+
+@responses.activate
+def test_falls_back_to_batch_requests_without_block_receipts_support():
+    calls = []
+    add_json_rpc_callback(False, calls)
+    cache = ReceiptCache()
+
+    receipts = cache.prefetch_block(16)
+    cache.prefetch_block(16)
+
+    assert [r.transaction_hash for r in receipts] == [
+        '0x' + str(i) * 64 for i in range(3)]
+    methods = [call['method'] if isinstance(call, dict) else 'batch' for call in calls]
+    assert methods == ['eth_getBlockReceipts', 'eth_getBlockByNumber',
+                       'batch', 'eth_getBlockByNumber', 'batch']
+    assert len(calls[2]) == 3
+
+
+def test_evicts_least_recently_used_receipts():
+    cache = ReceiptCache(max_receipts=2)
+    for i in range(3):
+        cache.put(Receipt({'transaction_hash': f'0x{i}'}))
+
+    assert cache.get('0x0') is None
+    assert cache.get('0x2').transaction_hash == '0x2'
@@ -0,0 +1,227 @@
+# Replays recorded events through a python bot's handlers without the forta cli or any network access (as long as
+# the bot itself does not make requests), e.g. to benchmark or regression test a bot in CI:
+#
+#   python -m forta_agent.replay <agent module> <events file> [<events file> ...] [--context <path>] [--lazy]
+#                                [--findings <path>] [--json]
+#
+# Event files are NDJSON, optionally gzip compressed ('-' reads stdin). Each line is either a single event, whose
+# type is inferred from its keys (an 'alert' key for alert events, a 'transaction' key for transaction events,
+# otherwise a block event), or a worker message like {"msgType": "handle_transaction", "events": [...]}.
+# Events are streamed, so files of any size can be replayed. Prints the throughput, the p50/p99 handler latency
+# and the findings counts per handler, and with --findings writes the findings of every event as one NDJSON line.
+import io
+import sys
+import gzip
+import time
+import argparse
+from .serialization import loads, dumps_bytes
+from .async_runner import AsyncRunner
+from .utils import create_transaction_event, create_block_event, create_alert_event
+from .worker import load_agent, has_async_handlers, INITIALIZE_METHOD_NAME, HANDLE_TRANSACTION_METHOD_NAME, \
+    HANDLE_BLOCK_METHOD_NAME, HANDLE_ALERT_METHOD_NAME
+
+GZIP_MAGIC = b'\x1f\x8b'
+
+
+def open_events_file(path):
+    # binary stream of the (decompressed) file contents
+    stream = sys.stdin.buffer if path == '-' else open(path, 'rb')
+    if not hasattr(stream, 'peek'):
+        stream = io.BufferedReader(stream)
+    if stream.peek(len(GZIP_MAGIC))[:len(GZIP_MAGIC)] == GZIP_MAGIC:
+        return gzip.GzipFile(fileobj=stream)
+    return stream
+
+
+def get_event_handler_name(event):
+    if 'alert' in event:
+        return HANDLE_ALERT_METHOD_NAME
+    if 'transaction' in event:
+        return HANDLE_TRANSACTION_METHOD_NAME
+    return HANDLE_BLOCK_METHOD_NAME
+
+
+def iter_events(stream):
+    # yields (handler name, raw event) for each event of the NDJSON stream
+    for line in stream:
+        if not line.strip():
+            continue
+        message = loads(line)
+        if 'msgType' in message:
+            for event in message.get('events', []):
+                yield message['msgType'], event
+        else:
+            yield get_event_handler_name(message), message
+
+
+def percentile(sorted_values, p):
+    # nearest-rank percentile of an already sorted list
+    if not sorted_values:
+        return None
+    index = max(0, min(len(sorted_values) - 1,
+                       int(round(p / 100 * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+class HandlerStats:
+    def __init__(self):
+        self.latencies = []
+        self.findings = 0
+
+    def to_dict(self):
+        latencies = sorted(self.latencies)
+        return {
+            'events': len(latencies),
+            'findings': self.findings,
+            'meanMs': sum(latencies) / len(latencies) * 1000 if latencies else None,
+            'p50Ms': percentile(latencies, 50) * 1000 if latencies else None,
+            'p99Ms': percentile(latencies, 99) * 1000 if latencies else None,
+            'maxMs': latencies[-1] * 1000 if latencies else None,
+        }
+
+
+class Replay:
+    def __init__(self, agent, lazy=False, on_findings=None):
+        self.agent = agent
+        self.on_findings = on_findings  # optional callback(index, handler name, findings) called for every event
+        self.async_runner = AsyncRunner() if has_async_handlers(agent) else None
+        self.event_factories = {
+            HANDLE_TRANSACTION_METHOD_NAME: lambda d: create_transaction_event(d, lazy),
+            HANDLE_BLOCK_METHOD_NAME: create_block_event,
+            HANDLE_ALERT_METHOD_NAME: create_alert_event,
+        }
+        self.stats = {}
+        self.findings_by_alert_id = {}
+        self.events = 0
+        self.skipped_events = 0  # events without a matching handler on the bot
+        self.seconds = 0
+
+    def initialize(self):
+        handler = getattr(self.agent, INITIALIZE_METHOD_NAME, None)
+        return self.call(handler) if handler is not None else None
+
+    def call(self, handler, *args):
+        result = handler(*args)
+        if self.async_runner is not None:
+            result = self.async_runner.run(result)
+        return result
+
+    def handle(self, handler_name, raw_event):
+        # returns the findings of the event, or None if the bot has no handler for it
+        if handler_name not in self.event_factories:
+            raise Exception(f'unknown msgType: {handler_name}')
+        handler = getattr(self.agent, handler_name, None)
+        if handler is None:
+            self.skipped_events += 1
+            return None
+        event = self.event_factories[handler_name](raw_event)
+        start = time.perf_counter()
+        findings = self.call(handler, event) or []
+        latency = time.perf_counter() - start
+        stats = self.stats.get(handler_name)
+        if stats is None:
+            stats = self.stats[handler_name] = HandlerStats()
+        stats.latencies.append(latency)
+        stats.findings += len(findings)
+        for finding in findings:
+            self.findings_by_alert_id[finding.alert_id] = self.findings_by_alert_id.get(
+                finding.alert_id, 0) + 1
+        return findings
+
+    def replay(self, events):
+        # events is an iterable of (handler name, raw event), e.g. from iter_events
+        start = time.perf_counter()
+        try:
+            for handler_name, raw_event in events:
+                findings = self.handle(handler_name, raw_event)
+                if findings is not None and self.on_findings is not None:
+                    self.on_findings(self.events, handler_name, findings)
+                self.events += 1
+        finally:
+            self.seconds += time.perf_counter() - start
+        return self.report()
+
+    def report(self):
+        return {
+            'events': self.events,
+            'skippedEvents': self.skipped_events,
+            'seconds': self.seconds,
+            'eventsPerSecond': self.events / self.seconds if self.seconds else None,
+            'findings': sum(stats.findings for stats in self.stats.values()),
+            'findingsByAlertId': dict(sorted(self.findings_by_alert_id.items())),
+            'handlers': {name: stats.to_dict() for name, stats in self.stats.items()},
+        }
+
+    def close(self):
+        if self.async_runner is not None:
+            self.async_runner.close()
+
+
+def format_report(report):
+    def ms(value):
+        return '-' if value is None else f'{value:.3f} ms'
+
+    lines = [f'{report["events"]} events in {report["seconds"]:.3f} s '
+             f'({report["eventsPerSecond"] or 0:.1f} events/s), {report["findings"]} findings'
+             + (f', {report["skippedEvents"]} events without handler' if report['skippedEvents'] else '')]
+    for name, stats in report['handlers'].items():
+        lines.append(f'  {name:20} {stats["events"]:8} events {stats["findings"]:8} findings  '
+                     f'p50 {ms(stats["p50Ms"])}  p99 {ms(stats["p99Ms"])}  max {ms(stats["maxMs"])}')
+    for alert_id, count in report['findingsByAlertId'].items():
+        lines.append(f'  {alert_id:20} {count:8} findings')
+    return '\n'.join(lines)
+
+
+def replay_files(agent, paths, lazy=False, on_findings=None):
+    # replays the events of the files in order through the agent and returns the report
+    replay = Replay(agent, lazy, on_findings)
+    try:
+        replay.initialize()
+        for path in paths:
+            stream = open_events_file(path)
+            try:
+                replay.replay(iter_events(stream))
+            finally:
+                if path != '-':
+                    stream.close()
+        return replay.report()
+    finally:
+        replay.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m forta_agent.replay')
+    parser.add_argument('agent_module')
+    parser.add_argument('paths', nargs='+', metavar='events_file',
+                        help='NDJSON file of events, optionally gzip compressed (- for stdin)')
+    parser.add_argument('--context', default=None)
+    parser.add_argument('--lazy', action='store_true',
+                        help='build transaction event sub-objects on first access')
+    parser.add_argument('--findings', default=None,
+                        help='write the findings of each event as NDJSON to this file')
+    parser.add_argument('--json', action='store_true',
+                        help='print the report as json')
+    args = parser.parse_args(argv)
+
+    agent = load_agent(args.agent_module, args.context)
+    findings_file = open(args.findings, 'wb') if args.findings else None
+
+    def write_findings(index, handler_name, findings):
+        findings_file.write(dumps_bytes({'event': index, 'msgType': handler_name,
+                                         'findings': [finding.to_dict() for finding in findings]}) + b'\n')
+
+    # keep the report on stdout and send bot output to stderr
+    stdout = sys.stdout
+    sys.stdout = sys.stderr
+    try:
+        report = replay_files(agent, args.paths, args.lazy,
+                              write_findings if findings_file is not None else None)
+    finally:
+        sys.stdout = stdout
+        if findings_file is not None:
+            findings_file.close()
+    print(dumps_bytes(report).decode('utf-8') if args.json else format_report(report))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,138 @@
+import io
+import sys
+import gzip
+import json
+import subprocess
+from types import SimpleNamespace
+import pytest
+from .replay import Replay, iter_events, open_events_file, percentile, replay_files
+
+AGENT_SOURCE = '''
+from forta_agent import Finding, FindingSeverity, FindingType
+
+
+def initialize():
+    print("initializing")
+
+
+def handle_transaction(tx_event):
+    print("handling", tx_event.hash)
+    if tx_event.to is None:
+        return []
+    return [Finding({"name": "name", "description": tx_event.hash, "alert_id": "ALERT-1",
+                     "severity": FindingSeverity.Low, "type": FindingType.Info})]
+
+
+async def handle_block(block_event):
+    return [Finding({"name": "name", "description": str(block_event.block_number), "alert_id": "ALERT-2",
+                     "severity": FindingSeverity.Low, "type": FindingType.Info})]
+'''
+
+EVENTS = [
+    {'transaction': {'hash': '0x1', 'to': '0xa'}},
+    {'transaction': {'hash': '0x2', 'to': None}},
+    {'block': {'number': 1, 'hash': '0xb1'}},
+    {'msgType': 'handle_transaction', 'events': [
+        {'transaction': {'hash': '0x3', 'to': '0xb'}}]},
+    {'alert': {'alertId': 'ALERT-3'}},
+]
+
+
+def write_events(path, events, compress=False):
+    data = b''.join(json.dumps(event).encode('utf-8') + b'\n\n' for event in events)
+    path.write_bytes(gzip.compress(data) if compress else data)
+    return str(path)
+
+
+def test_iter_events_infers_handler_and_expands_worker_messages():
+    stream = io.BytesIO(b''.join(json.dumps(event).encode('utf-8') + b'\n' for event in EVENTS))
+
+    assert [name for name, _ in iter_events(stream)] == [
+        'handle_transaction', 'handle_transaction', 'handle_block', 'handle_transaction', 'handle_alert']
+
+
+def test_open_events_file_reads_plain_and_gzip_files(tmp_path):
+    plain = write_events(tmp_path / 'events.ndjson', EVENTS)
+    compressed = write_events(tmp_path / 'events.ndjson.gz', EVENTS, compress=True)
+
+    with open_events_file(plain) as stream:
+        plain_events = list(iter_events(stream))
+    with open_events_file(compressed) as stream:
+        compressed_events = list(iter_events(stream))
+
+    assert len(plain_events) == 5
+    assert compressed_events == plain_events
+
+
+def test_percentile():
+    values = list(range(1, 101))
+
+    assert percentile(values, 50) == 50
+    assert percentile(values, 99) == 99
+    assert percentile([5], 99) == 5
+    assert percentile([], 50) is None
+
+
+def test_replay_reports_latency_and_findings_per_handler(create_finding):
+    agent = SimpleNamespace(handle_transaction=lambda tx_event: [
+        create_finding(tx_event.hash)] if tx_event.to else [])
+    written = []
+    replay = Replay(agent, on_findings=lambda index, name,
+                    findings: written.append((index, name, len(findings))))
+
+    report = replay.replay(iter_events(io.BytesIO(
+        b''.join(json.dumps(event).encode('utf-8') + b'\n' for event in EVENTS))))
+
+    assert report['events'] == 5
+    assert report['skippedEvents'] == 2  # no block and alert handlers
+    assert report['findings'] == 2
+    assert report['findingsByAlertId'] == {'ALERT-1': 2}
+    stats = report['handlers']['handle_transaction']
+    assert stats['events'] == 3
+    assert stats['findings'] == 2
+    assert 0 <= stats['p50Ms'] <= stats['p99Ms'] <= stats['maxMs']
+    assert report['eventsPerSecond'] > 0
+    assert written == [(0, 'handle_transaction', 1), (1, 'handle_transaction', 0),
+                       (3, 'handle_transaction', 1)]
+
+
+def test_replay_raises_on_handler_exception():
+    def handle_block(block_event):
+        raise ValueError('boom')
+    replay = Replay(SimpleNamespace(handle_block=handle_block))
+
+    with pytest.raises(ValueError):
+        replay.replay([('handle_block', {})])
+
+
+def test_replay_files_runs_async_handlers(tmp_path):
+    (tmp_path / 'test_agent.py').write_text(AGENT_SOURCE)
+    sys.path.append(str(tmp_path))
+    try:
+        import test_agent
+        report = replay_files(test_agent, [write_events(tmp_path / 'events.ndjson.gz', EVENTS, compress=True)])
+    finally:
+        sys.path.remove(str(tmp_path))
+        sys.modules.pop('test_agent', None)
+
+    assert report['findingsByAlertId'] == {'ALERT-1': 2, 'ALERT-2': 1}
+    assert report['handlers']['handle_block']['events'] == 1
+
+
+def test_replay_process_writes_report_and_findings(tmp_path):
+    (tmp_path / 'test_agent.py').write_text(AGENT_SOURCE)
+    events_path = write_events(tmp_path / 'events.ndjson', EVENTS)
+    findings_path = tmp_path / 'findings.ndjson'
+
+    process = subprocess.run(
+        [sys.executable, '-m', 'forta_agent.replay', 'test_agent', events_path, '--context', str(tmp_path),
+         '--findings', str(findings_path), '--json'],
+        stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=True, timeout=60)
+
+    report = json.loads(process.stdout)
+    assert report['events'] == 5
+    assert report['findings'] == 3
+    assert b'initializing' in process.stderr
+    findings = [json.loads(line) for line in findings_path.read_bytes().splitlines()]
+    assert [(line['event'], len(line['findings'])) for line in findings] == [(0, 1), (1, 0), (2, 1), (3, 1)]
+    assert findings[0]['findings'][0]['description'] == '0x1'
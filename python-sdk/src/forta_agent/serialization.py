@@ -0,0 +1,34 @@
+import json
+
+# use a faster json library if one is installed (pip install forta_agent[fast]), otherwise the stdlib
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+BACKEND = 'orjson' if orjson is not None else 'json'
+
+ENCODE_ERRORS = (TypeError, OverflowError, ValueError)
+if orjson is not None:
+    ORJSON_OPTIONS = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+
+
+def loads(data):
+    # data can be str or bytes
+    if BACKEND == 'orjson':
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def dumps_bytes(obj):
+    # values that are not json serializable are converted using str() (same as json.dumps(obj, default=str))
+    try:
+        if BACKEND == 'orjson':
+            return orjson.dumps(obj, default=str, option=ORJSON_OPTIONS)
+    except ENCODE_ERRORS:
+        pass  # e.g. integers larger than 64 bits, fall back to the stdlib
+    return json.dumps(obj, default=str).encode('utf-8')
+
+
+def dumps(obj):
+    return dumps_bytes(obj).decode('utf-8')
@@ -0,0 +1,29 @@
+import json
+from datetime import datetime
+import pytest
+from . import serialization
+from .serialization import loads, dumps, dumps_bytes
+from .finding import FindingSeverity
+
+BACKENDS = ['json'] + (['orjson'] if serialization.orjson is not None else [])
+
+
+@pytest.fixture(params=BACKENDS)
+def backend(request, monkeypatch):
+    monkeypatch.setattr(serialization, 'BACKEND', request.param)
+    return request.param
+
+
+def test_round_trip(backend):
+    obj = {'a': [1, 2.5, None, True], 'b': {'c': 'd'}}
+
+    assert loads(dumps_bytes(obj)) == obj
+    assert loads(dumps(obj)) == obj
+    assert isinstance(dumps(obj), str)
+
+
+def test_dumps_matches_stdlib_for_non_native_values(backend):
+    obj = {'severity': FindingSeverity.High, 'timestamp': datetime(2023, 1, 1),
+           'big': 2**200, 'set': {1}}
+
+    assert loads(dumps(obj)) == json.loads(json.dumps(obj, default=str))
@@ -0,0 +1,57 @@
+import pytest
+from .utils import get_settings, reload_settings, get_bot_id, get_chain_id, get_json_rpc_url, get_forta_api_url, get_forta_api_headers
+
+
+@pytest.fixture
+def settings_env(monkeypatch):
+    yield monkeypatch
+    monkeypatch.undo()
+    reload_settings()
+
+
+def test_settings_are_resolved_once():
+    assert get_settings() is get_settings()
+
+
+def test_settings_are_not_updated_until_reloaded(settings_env):
+    reload_settings()
+    settings_env.setenv('JSON_RPC_HOST', 'localhost')
+    settings_env.setenv('JSON_RPC_PORT', '8545')
+    settings_env.setenv('FORTA_PUBLIC_API_PROXY_HOST', 'proxy')
+    settings_env.setenv('FORTA_API_KEY', 'some-key')
+    settings_env.setenv('FORTA_BOT_ID', '123')
+    settings_env.setenv('FORTA_CHAIN_ID', '137')
+
+    assert get_json_rpc_url() != 'http://localhost:8545'
+
+    settings = reload_settings()
+
+    assert get_settings() is settings
+    assert get_json_rpc_url() == 'http://localhost:8545'
+    assert get_forta_api_url() == 'http://proxy/graphql'
+    assert get_forta_api_headers() == {
+        'content-type': 'application/json', 'Authorization': 'Bearer some-key'}
+    assert get_bot_id() == 123
+    assert get_chain_id() == 137
+
+
+def test_settings_are_immutable():
+    settings = get_settings()
+
+    with pytest.raises(AttributeError):
+        settings.forta_api_url = 'http://other'
+    with pytest.raises(TypeError):
+        settings.forta_api_headers['Authorization'] = 'Bearer other'
+    # callers get a copy of the headers they can change
+    headers = get_forta_api_headers()
+    headers['x'] = 'y'
+    assert 'x' not in get_settings().forta_api_headers
+
+
+def test_raises_for_non_http_json_rpc_url(settings_env):
+    settings_env.setattr('forta_agent.utils.get_forta_config',
+                         lambda: {'jsonRpcUrl': 'ws://localhost:8546'})
+    reload_settings()
+
+    with pytest.raises(Exception, match='jsonRpcUrl must begin with http'):
+        get_json_rpc_url()
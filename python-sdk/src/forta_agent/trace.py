@@ -2,6 +2,10 @@ from .utils import hex_to_int
 
 
 class Trace:
+    __slots__ = ('action', 'block_hash', 'block_number', 'result', 'subtraces',
+                 'trace_address', 'transaction_hash', 'transaction_position',
+                 'type', 'error')
+
     def __init__(self, dict):
         self.action = TraceAction(dict.get('action', {}))
         self.block_hash = dict.get('blockHash', dict.get('block_hash'))
@@ -19,6 +23,9 @@ class Trace:
 
 
 class TraceAction:
+    __slots__ = ('call_type', 'to', 'input', 'from_', 'value', 'init',
+                 'address', 'balance', 'refund_address')
+
     def __init__(self, dict):
         self.call_type = dict.get('callType', dict.get('call_type'))
         self.to = dict.get('to')
@@ -33,6 +40,8 @@ class TraceAction:
 
 
 class TraceResult:
+    __slots__ = ('gas_used', 'address', 'code', 'output')
+
     def __init__(self, dict):
         self.gas_used = hex_to_int(dict.get('gasUsed', dict.get('gas_used')))
         self.address = dict.get('address')
@@ -2,6 +2,9 @@ from .utils import hex_to_int
 
 
 class Transaction:
+    __slots__ = ('hash', 'from_', 'to', 'nonce', 'gas', 'gas_price', 'value',
+                 'data', 'r', 's', 'v')
+
     def __init__(self, dict):
         self.hash = dict.get('hash')
         self.from_ = dict.get('from')
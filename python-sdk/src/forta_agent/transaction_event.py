@@ -1,5 +1,3 @@
-import json
-from hexbytes import HexBytes
 from .event_type import EventType
 from .network import Network
 from .transaction import Transaction
@@ -15,7 +13,7 @@ class TxEventBlock:
 
 
 class TransactionEvent:
-    def __init__(self, dict):
+    def __init__(self, dict, lazy=False):
         typeVal = dict.get('type', "BLOCK")
         self.type = EventType[typeVal] if type(
             typeVal) == str else EventType(typeVal)
@@ -24,24 +22,81 @@ class TransactionEvent:
             networkVal) == str and networkVal.isdigit() else networkVal
         self.network = Network[networkVal] if type(
             networkVal) == str else Network(networkVal)
-        self.transaction = Transaction(dict.get('transaction', {}))
-        self.traces = list(map(lambda t: Trace(t), dict.get('traces', [])))
         self.addresses = dict.get('addresses', {})
         self.block = TxEventBlock(dict.get('block', {}))
-        self.logs = list(map(lambda l: Log(l), dict.get('logs', [])))
         self.contract_address = dict.get(
             'contractAddress', dict.get('contract_address'))
+        # transaction, traces and logs are built from the raw dicts on first access
+        # (raw references are released once materialized)
+        self._raw_transaction = dict.get('transaction', {})
+        self._raw_traces = dict.get('traces', [])
+        self._raw_logs = dict.get('logs', [])
+        self._transaction = None
+        self._traces = None
+        self._logs = None
+        if not lazy:
+            self.materialize()
+
+    def materialize(self):
+        # eagerly build all sub-objects (no-op for those already built)
+        self.transaction
+        self.traces
+        self.logs
+
+    @property
+    def transaction(self):
+        if self._transaction is None:
+            self._transaction = Transaction(self._raw_transaction)
+            self._raw_transaction = None
+        return self._transaction
+
+    @transaction.setter
+    def transaction(self, transaction):
+        self._transaction = transaction
+        self._raw_transaction = None
+
+    @property
+    def traces(self):
+        if self._traces is None:
+            self._traces = list(map(lambda t: Trace(t), self._raw_traces))
+            self._raw_traces = None
+        return self._traces
+
+    @traces.setter
+    def traces(self, traces):
+        self._traces = traces
+        self._raw_traces = None
+
+    @property
+    def logs(self):
+        if self._logs is None:
+            self._logs = list(map(lambda l: Log(l), self._raw_logs))
+            self._raw_logs = None
+        return self._logs
+
+    @logs.setter
+    def logs(self, logs):
+        self._logs = logs
+        self._raw_logs = None
+
+    # hash/to/from_ are read straight from the raw transaction if it has not been materialized yet
 
     @property
     def hash(self):
+        if self._transaction is None:
+            return self._raw_transaction.get('hash')
         return self.transaction.hash
 
     @property
     def to(self):
+        if self._transaction is None:
+            return self._raw_transaction.get('to')
         return self.transaction.to
 
     @property
     def from_(self):
+        if self._transaction is None:
+            return self._raw_transaction.get('from')
         return self.transaction.from_
 
     @property
@@ -61,8 +116,9 @@ class TransactionEvent:
         return self.block.hash
 
     def filter_log(self, abi, contract_address=''):
-        abi = abi if isinstance(abi, list) else [abi]
-        abi = [json.loads(abi_item) for abi_item in abi]
+        from hexbytes import HexBytes  # web3 modules are imported on first use
+        from .abi_decoder import get_compiled_abi
+        compiled_abi = get_compiled_abi(abi)
         logs = self.logs
         # filter logs by contract address, if provided
         if (contract_address):
@@ -72,29 +128,18 @@ class TransactionEvent:
                 address.lower(): True for address in contract_address}
             logs = filter(lambda log: log.address.lower()
                           in contract_address_map, logs)
-        # determine which event names to filter
-        event_names = []
-        for abi_item in abi:
-            if abi_item['type'] == "event":
-                event_names.append(abi_item['name'])
-        # parse logs
+        # parse logs (dispatched by topic0 to the matching event decoder)
         results = []
-        from . import web3Provider
-        contract = web3Provider.eth.contract(
-            "0x0000000000000000000000000000000000000000", abi=abi)
         for log in logs:
             log.topics = [HexBytes(topic) for topic in log.topics]
-            for event_name in event_names:
-                try:
-                    results.append(
-                        contract.events[event_name]().processLog(log))
-                except:
-                    continue  # TODO see if theres a better way to handle 'no matching event' error
+            decoded_log = compiled_abi.decode_log(log)
+            if decoded_log is not None:
+                results.append(decoded_log)
         return results
 
     def filter_function(self, abi, contract_address=''):
-        abi = abi if isinstance(abi, list) else [abi]
-        abi = [json.loads(abi_object) for abi_object in abi]
+        from .abi_decoder import get_compiled_abi  # web3 modules are imported on first use
+        compiled_abi = get_compiled_abi(abi)
         # determine where to look for function calls (i.e. transaction object or traces)
         sources = [{'data': self.transaction.data, 'to': self.transaction.to}]
         if self.traces:
@@ -108,17 +153,5 @@ class TransactionEvent:
                 address.lower(): True for address in contract_address}
             sources = filter(
                 lambda source: source['to'] and source['to'].lower() in contract_address_map, sources)
-        # parse function inputs
-        results = []
-        from . import web3Provider
-        contract = web3Provider.eth.contract(
-            "0x0000000000000000000000000000000000000000", abi=abi)
-        for source in sources:
-            try:
-                decoded_function = contract.decode_function_input(
-                    source['data'])
-                decoded_function[1]["address"] = source['to'].lower()
-                results.append(decoded_function)
-            except:
-                continue  # TODO see if theres a better way to handle 'no matching function' error
-        return results
+        # parse function inputs (sources without a known 4-byte selector are skipped before decoding)
+        return compiled_abi.decode_function_inputs(sources)
@@ -0,0 +1,167 @@
+from .transaction_event import TransactionEvent
+from .abi_decoder import get_compiled_abi
+
+TRANSFER_EVENT_ABI = '{"anonymous":false,"inputs":[{"indexed":true,"name":"from","type":"address"},{"indexed":true,"name":"to","type":"address"},{"indexed":false,"name":"value","type":"uint256"}],"name":"Transfer","type":"event"}'
+APPROVAL_EVENT_ABI = '{"anonymous":false,"inputs":[{"indexed":true,"name":"owner","type":"address"},{"indexed":true,"name":"spender","type":"address"},{"indexed":false,"name":"value","type":"uint256"}],"name":"Approval","type":"event"}'
+TRANSFER_TOPIC = "0xddf252ad1be2c89b69c2b068fc378daa952ba7f163c4a11628f55a4df523b3ef"
+APPROVAL_TOPIC = "0x8c5be1e5ebec7d5bd14f71427d1e84f3dd0314c0f7b2291e5b200ac8c7c3b925"
+TOKEN_ADDRESS = "0x6b175474e89094c44da98b954eedeac495271d0f"
+OTHER_ADDRESS = "0xa0b86991c6218b36c1d19d4a2e9eb0ce3606eb48"
+FROM_ADDRESS = "0x1111111111111111111111111111111111111111"
+TO_ADDRESS = "0x2222222222222222222222222222222222222222"
+
+
+def pad_address(address):
+    return "0x" + "0" * 24 + address[2:]
+
+
+def create_log(topic, address=TOKEN_ADDRESS, value=1000, log_index=0):
+    return {
+        "address": address,
+        "topics": [topic, pad_address(FROM_ADDRESS), pad_address(TO_ADDRESS)],
+        "data": "0x" + hex(value)[2:].rjust(64, "0"),
+        "logIndex": log_index,
+        "blockNumber": 1,
+        "blockHash": "0x" + "0" * 64,
+        "transactionIndex": 0,
+        "transactionHash": "0x" + "1" * 64,
+        "removed": False,
+    }
+
+
+def create_tx_event(logs):
+    return TransactionEvent({"transaction": {}, "block": {}, "logs": logs})
+
+
+def test_filter_log_decodes_matching_events():
+    tx_event = create_tx_event([
+        create_log(TRANSFER_TOPIC, value=1000, log_index=0),
+        create_log(APPROVAL_TOPIC, value=5, log_index=1),
+        create_log("0x" + "f" * 64, log_index=2),
+    ])
+
+    transfers = tx_event.filter_log(TRANSFER_EVENT_ABI)
+
+    assert len(transfers) == 1
+    assert transfers[0]["event"] == "Transfer"
+    assert transfers[0]["args"]["value"] == 1000
+    assert transfers[0]["args"]["from"].lower() == FROM_ADDRESS
+    assert transfers[0]["logIndex"] == 0
+
+    events = tx_event.filter_log([TRANSFER_EVENT_ABI, APPROVAL_EVENT_ABI])
+
+    assert [e["event"] for e in events] == ["Transfer", "Approval"]
+
+
+def test_filter_log_filters_by_contract_address():
+    tx_event = create_tx_event([
+        create_log(TRANSFER_TOPIC, address=TOKEN_ADDRESS, log_index=0),
+        create_log(TRANSFER_TOPIC, address=OTHER_ADDRESS, log_index=1),
+    ])
+
+    transfers = tx_event.filter_log(
+        TRANSFER_EVENT_ABI, OTHER_ADDRESS.upper().replace("0X", "0x"))
+
+    assert len(transfers) == 1
+    assert transfers[0]["logIndex"] == 1
+
+
+def test_filter_log_skips_log_with_matching_topic_but_wrong_layout():
+    log = create_log(TRANSFER_TOPIC)
+    log["topics"] = log["topics"][:1]  # e.g. Transfer with no indexed params
+    tx_event = create_tx_event([log])
+
+    assert tx_event.filter_log(TRANSFER_EVENT_ABI) == []
+
+
+def test_compiled_abi_is_cached_by_abi_text():
+    compiled_abi = get_compiled_abi([TRANSFER_EVENT_ABI, APPROVAL_EVENT_ABI])
+
+    assert get_compiled_abi(
+        [TRANSFER_EVENT_ABI, APPROVAL_EVENT_ABI]) is compiled_abi
+    assert get_compiled_abi(TRANSFER_EVENT_ABI) is not compiled_abi
+    assert len(compiled_abi.events_by_topic) == 2
+
+
+TRANSFER_FUNCTION_ABI = '{"inputs":[{"name":"to","type":"address"},{"name":"amount","type":"uint256"}],"name":"transfer","outputs":[{"name":"","type":"bool"}],"stateMutability":"nonpayable","type":"function"}'
+TRANSFER_SELECTOR = "0xa9059cbb"
+
+
+def create_transfer_calldata(amount):
+    return TRANSFER_SELECTOR + pad_address(TO_ADDRESS)[2:] + hex(amount)[2:].rjust(64, "0")
+
+
+def create_trace(to, input):
+    return {"action": {"to": to, "input": input, "from": FROM_ADDRESS, "value": "0x0"}, "result": {}}
+
+
+def test_filter_function_decodes_transaction_data_when_no_traces():
+    tx_event = TransactionEvent({"transaction": {
+        "to": TOKEN_ADDRESS, "data": create_transfer_calldata(7)}, "block": {}})
+
+    results = tx_event.filter_function(TRANSFER_FUNCTION_ABI)
+
+    assert len(results) == 1
+    function, inputs = results[0]
+    assert function.fn_name == "transfer"
+    assert inputs["amount"] == 7
+    assert inputs["to"].lower() == TO_ADDRESS
+    assert inputs["address"] == TOKEN_ADDRESS
+
+
+def test_filter_function_decodes_traces_with_known_selector_only():
+    tx_event = TransactionEvent({"transaction": {}, "block": {}, "traces": [
+        create_trace(TOKEN_ADDRESS, create_transfer_calldata(1)),
+        create_trace(TOKEN_ADDRESS, "0x"),
+        create_trace(OTHER_ADDRESS, "0x12345678" + "0" * 64),
+        create_trace(OTHER_ADDRESS, create_transfer_calldata(2)),
+        create_trace(None, create_transfer_calldata(3)),
+        create_trace(TOKEN_ADDRESS, TRANSFER_SELECTOR + "00"),  # malformed
+    ]})
+
+    results = tx_event.filter_function(TRANSFER_FUNCTION_ABI)
+
+    assert [inputs["amount"] for _, inputs in results] == [1, 2]
+
+    results = tx_event.filter_function(TRANSFER_FUNCTION_ABI, OTHER_ADDRESS)
+
+    assert len(results) == 1
+    assert results[0][1]["amount"] == 2
+    assert results[0][1]["address"] == OTHER_ADDRESS
+
+
+def test_lazy_transaction_event_materializes_on_first_access():
+    tx_event = TransactionEvent({
+        "transaction": {"hash": "0xabc", "to": TOKEN_ADDRESS, "from": FROM_ADDRESS, "gasPrice": "0x10"},
+        "block": {"number": 1},
+        "traces": [create_trace(TOKEN_ADDRESS, "0x")],
+        "logs": [create_log(TRANSFER_TOPIC)],
+    }, lazy=True)
+
+    assert tx_event.hash == "0xabc"
+    assert tx_event.to == TOKEN_ADDRESS
+    assert tx_event.from_ == FROM_ADDRESS
+    assert tx_event._transaction is None
+    assert tx_event._traces is None
+    assert tx_event._logs is None
+
+    assert tx_event.gas_price == 16
+    assert tx_event.transaction is tx_event.transaction
+    logs = tx_event.logs
+    assert len(logs) == 1
+    assert logs[0].address == TOKEN_ADDRESS
+    assert tx_event.logs is logs
+    assert tx_event._traces is None
+    assert tx_event.traces[0].action.to == TOKEN_ADDRESS
+
+
+def test_eager_transaction_event_materializes_in_constructor():
+    tx_event = TransactionEvent({
+        "transaction": {"hash": "0xabc"}, "block": {}, "logs": [create_log(TRANSFER_TOPIC)]})
+
+    assert tx_event._transaction is not None
+    assert tx_event._traces == []
+    assert len(tx_event._logs) == 1
+
+    tx_event.logs = []
+    assert tx_event.filter_log(TRANSFER_EVENT_ABI) == []
@@ -1,15 +1,16 @@
 import sys
 import os
-from jsonc_parser.parser import JsoncParser
-from web3 import Web3
+from collections import namedtuple
+from types import MappingProxyType
 
 chain_id = None
 
 
 def get_chain_id():
     # if chain id provided by scanner i.e. in production
-    if 'FORTA_CHAIN_ID' in os.environ:
-        return int(os.environ['FORTA_CHAIN_ID'])
+    settings = get_settings()
+    if settings.chain_id is not None:
+        return int(settings.chain_id)
 
     # query from the web3 provider i.e. for developing locally
     global chain_id
@@ -24,10 +25,26 @@ def get_web3_provider():
     return web3Provider
 
 
+async_web3_provider = None
+
+
+def get_async_web3_provider():
+    # web3 instance for use inside async handlers (e.g. await provider.eth.get_block(...))
+    global async_web3_provider
+    if async_web3_provider is None:
+        from web3 import Web3
+        from web3.eth import AsyncEth
+        from web3.net import AsyncNet
+        async_web3_provider = Web3(Web3.AsyncHTTPProvider(get_json_rpc_url()), middlewares=[],
+                                   modules={'eth': (AsyncEth,), 'net': (AsyncNet,)})
+    return async_web3_provider
+
+
 def get_bot_owner():
     # if bot owner provided by scanner i.e. in production
-    if 'FORTA_BOT_OWNER' in os.environ:
-        return int(os.environ['FORTA_BOT_OWNER'])
+    settings = get_settings()
+    if settings.bot_owner is not None:
+        return int(settings.bot_owner)
 
     # return a mock value for local development
     return "0xMockOwner"
@@ -35,8 +52,9 @@ def get_bot_owner():
 
 def get_bot_id():
     # if bot id provided by scanner i.e. in production
-    if 'FORTA_BOT_ID' in os.environ:
-        return int(os.environ['FORTA_BOT_ID'])
+    settings = get_settings()
+    if settings.bot_id is not None:
+        return int(settings.bot_id)
 
     # return a mock value for local development
     return "0xMockBotId"
@@ -50,6 +68,7 @@ def get_forta_config():
     if (forta_config is not None):
         return forta_config
 
+    from jsonc_parser.parser import JsoncParser
     forta_config = {}
     # try to read global config
     global_config_path = os.path.join(
@@ -71,42 +90,90 @@ def get_forta_config():
 
 
 def get_json_rpc_url():
-    if 'JSON_RPC_HOST' in os.environ:
-        return f'http://{os.environ["JSON_RPC_HOST"]}{":"+os.environ["JSON_RPC_PORT"] if "JSON_RPC_PORT" in os.environ else ""}'
-
-    config = get_forta_config()
-    if "jsonRpcUrl" not in config:
-        return "https://cloudflare-eth.com/"
-    if not str(config.get("jsonRpcUrl")).startswith("http"):
-        raise Exception("jsonRpcUrl must begin with http(s)")
-    return config.get("jsonRpcUrl")
+    settings = get_settings()
+    if settings.json_rpc_url_error is not None:
+        raise Exception(settings.json_rpc_url_error)
+    return settings.json_rpc_url
 
 
 def get_forta_api_url():
-    if 'FORTA_PUBLIC_API_PROXY_HOST' in os.environ:
-        return f'http://{os.environ["FORTA_PUBLIC_API_PROXY_HOST"]}{":"+os.environ["FORTA_PUBLIC_API_PROXY_PORT"] if "FORTA_PUBLIC_API_PROXY_PORT" in os.environ else ""}/graphql'
-
-    config = get_forta_config()
-    if "fortaApiUrl" not in config:
-        return "https://api.forta.network/graphql"
-    return config.get("fortaApiUrl")
+    return get_settings().forta_api_url
 
 
 def get_forta_api_headers():
-    headers = {"content-type": "application/json"}
+    return dict(get_settings().forta_api_headers)
+
 
-    if 'FORTA_API_KEY' in os.environ:
-        headers["Authorization"] = f'Bearer {os.environ["FORTA_API_KEY"]}'
+# snapshot of the environment variables and forta config the sdk reads, resolved once (on first use) instead of
+# on every call. Env vars that are not set are None. NODE_ENV is not part of it and is still read on every use
+Settings = namedtuple('Settings', ['chain_id', 'bot_id', 'bot_owner', 'json_rpc_url', 'json_rpc_url_error',
+                                   'forta_api_url', 'forta_api_headers'])
+settings = None
+
+
+def get_settings():
+    global settings
+    if settings is None:
+        settings = resolve_settings()
+    return settings
+
+
+def reload_settings():
+    # re-reads the environment and forta config files, e.g. after changing environment variables
+    global settings, forta_config
+    forta_config = None
+    settings = resolve_settings()
+    return settings
+
+
+def resolve_settings():
+    environ = os.environ
+    json_rpc_url = None
+    json_rpc_url_error = None
+    if 'JSON_RPC_HOST' in environ:
+        json_rpc_url = f'http://{environ["JSON_RPC_HOST"]}{":"+environ["JSON_RPC_PORT"] if "JSON_RPC_PORT" in environ else ""}'
+    else:
+        config = get_forta_config()
+        if "jsonRpcUrl" not in config:
+            json_rpc_url = "https://cloudflare-eth.com/"
+        elif not str(config.get("jsonRpcUrl")).startswith("http"):
+            json_rpc_url_error = "jsonRpcUrl must begin with http(s)"
+        else:
+            json_rpc_url = config.get("jsonRpcUrl")
+
+    if 'FORTA_PUBLIC_API_PROXY_HOST' in environ:
+        forta_api_url = f'http://{environ["FORTA_PUBLIC_API_PROXY_HOST"]}{":"+environ["FORTA_PUBLIC_API_PROXY_PORT"] if "FORTA_PUBLIC_API_PROXY_PORT" in environ else ""}/graphql'
+    else:
+        forta_api_url = get_forta_config().get(
+            "fortaApiUrl", "https://api.forta.network/graphql")
+
+    headers = {"content-type": "application/json"}
+    if 'FORTA_API_KEY' in environ:
+        headers["Authorization"] = f'Bearer {environ["FORTA_API_KEY"]}'
     else:
         config = get_forta_config()
         if "fortaApiKey" in config:
             headers["Authorization"] = f'Bearer {config.get("fortaApiKey")}'
 
-    return headers
+    return Settings(
+        chain_id=environ.get('FORTA_CHAIN_ID'),
+        bot_id=environ.get('FORTA_BOT_ID'),
+        bot_owner=environ.get('FORTA_BOT_OWNER'),
+        json_rpc_url=json_rpc_url,
+        json_rpc_url_error=json_rpc_url_error,
+        forta_api_url=forta_api_url,
+        forta_api_headers=MappingProxyType(headers),
+    )
 
 
 def get_transaction_receipt(tx_hash):
     from .receipt import Receipt  # avoid circular import
+    from .receipt_cache import get_receipt_cache
+    # served from memory if the receipts of its block were prefetched (see prefetch_block_receipts)
+    receipt_cache = get_receipt_cache()
+    cached_receipt = receipt_cache.get(tx_hash)
+    if cached_receipt is not None:
+        return cached_receipt
     web3_provider = get_web3_provider()
     receipt = web3_provider.eth.get_transaction_receipt(tx_hash)
     return Receipt({
@@ -134,14 +201,51 @@ def get_transaction_receipt(tx_hash):
     })
 
 
+async def get_transaction_receipt_async(tx_hash):
+    from .receipt import Receipt  # avoid circular import
+    from web3.exceptions import TransactionNotFound
+    web3_provider = get_async_web3_provider()
+    receipt = await web3_provider.manager.coro_request('eth_getTransactionReceipt', [tx_hash])
+    if receipt is None:
+        raise TransactionNotFound(f"Transaction with hash: {tx_hash} not found.")
+    return Receipt(format_json_rpc_receipt(receipt))
+
+
+def format_json_rpc_receipt(receipt):
+    # converts a raw (hex-encoded) json-rpc receipt into the same shape used by get_transaction_receipt
+    return {
+        "status": hex_to_int(receipt.get("status")) == 1,
+        "root": receipt.get("root"),
+        "gas_used": hex_to_int(receipt.get("gasUsed")),
+        "cumulative_gas_used": hex_to_int(receipt.get("cumulativeGasUsed")),
+        "logs_bloom": receipt.get("logsBloom"),
+        "contract_address": None if receipt.get("contractAddress") == None else receipt.get("contractAddress").lower(),
+        "block_number": hex_to_int(receipt.get("blockNumber")),
+        "block_hash": receipt.get("blockHash"),
+        "transaction_index": hex_to_int(receipt.get("transactionIndex")),
+        "transaction_hash": receipt.get("transactionHash"),
+        "logs": list(map(lambda log: {
+            "address": log.get("address").lower(),
+            "topics": log.get("topics", []),
+            "data": log.get("data"),
+            "log_index": hex_to_int(log.get("logIndex")),
+            "block_number": hex_to_int(log.get("blockNumber")),
+            "block_hash": log.get("blockHash"),
+            "transaction_index": hex_to_int(log.get("transactionIndex")),
+            "transaction_hash": log.get("transactionHash"),
+            "removed": log.get("removed")
+        }, receipt.get("logs", []))),
+    }
+
+
 def create_block_event(dict):
     from .block_event import BlockEvent  # avoid circular import
     return BlockEvent(dict)
 
 
-def create_transaction_event(dict):
+def create_transaction_event(dict, lazy=False):
     from .transaction_event import TransactionEvent  # avoid circular import
-    return TransactionEvent(dict)
+    return TransactionEvent(dict, lazy)
 
 
 def create_alert_event(dict):
@@ -171,4 +275,5 @@ def hex_to_int(strVal):
 
 
 def keccak256(val):
+    from web3 import Web3
     return Web3.keccak(text=val).hex()
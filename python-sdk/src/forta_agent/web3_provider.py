@@ -0,0 +1,200 @@
+import time
+import functools
+import itertools
+import threading
+import lru
+import requests
+from requests.adapters import HTTPAdapter
+from web3 import Web3
+from web3.providers.base import JSONBaseProvider
+from web3.middleware import construct_simple_cache_middleware
+from .utils import get_json_rpc_url
+from .serialization import loads, dumps_bytes
+
+DEFAULT_POOL_SIZE = 20
+DEFAULT_TIMEOUT_SECONDS = 30
+DEFAULT_CACHE_SIZE = 0  # response caching is opt-in, e.g. create_web3_provider(cache_size=1024)
+# results for a block number (or of a transaction mined in it) are only cached once the block is this many blocks
+# behind the head of the chain, so that they cannot change with a reorg
+DEFAULT_SAFE_BLOCK_DEPTH = 64
+HEAD_REFRESH_SECONDS = 1
+# responses that never change once their block is final: the chain id, and data of mined transactions and of
+# blocks by hash or number
+IMMUTABLE_RPC_METHODS = {
+    'eth_chainId',
+    'net_version',
+    'eth_getBlockByHash',
+    'eth_getBlockByNumber',
+    'eth_getTransactionByHash',
+    'eth_getTransactionReceipt',
+    'eth_getBlockReceipts',
+}
+# results of these methods depend on the state at a block, so they are immutable for an explicit (historical)
+# block but not for tags like 'latest'
+BLOCK_STATE_RPC_METHODS = {
+    'eth_call',
+    'eth_getBalance',
+    'eth_getCode',
+    'eth_getStorageAt',
+    'eth_getTransactionCount',
+}
+BLOCK_TAGS = ('latest', 'pending', 'earliest', 'safe', 'finalized')
+
+
+class ChainHead:
+    # latest block number of the chain, fetched with eth_blockNumber when a block might be within the reorg
+    # depth (at most every HEAD_REFRESH_SECONDS)
+    def __init__(self, provider, safe_depth=DEFAULT_SAFE_BLOCK_DEPTH):
+        self.provider = provider
+        self.safe_depth = safe_depth
+        self.number = None
+        self.updated = None
+        self.lock = threading.Lock()
+
+    def is_safe(self, block_number):
+        # whether the block is far enough behind the head to not be affected by reorgs
+        if self.number is None or block_number > self.number - self.safe_depth:
+            self.refresh()
+        return self.number is not None and block_number <= self.number - self.safe_depth
+
+    def refresh(self):
+        with self.lock:
+            now = time.monotonic()
+            if self.updated is not None and now - self.updated < HEAD_REFRESH_SECONDS:
+                return
+            self.updated = now
+            try:
+                response = self.provider.make_request('eth_blockNumber', [])
+            except requests.RequestException:
+                return
+            if response.get('result') is not None:
+                self.number = max(self.number or 0, to_block_number(response['result']))
+
+
+def should_cache_response(chain_head, method, params, response):
+    if 'error' in response or response.get('result') is None:
+        return False  # e.g. a transaction that is not mined yet
+    if method in ('eth_getBlockByNumber', 'eth_getBlockReceipts') or method in BLOCK_STATE_RPC_METHODS:
+        if len(params) == 0:
+            return False
+        block_identifier = params[-1 if method in BLOCK_STATE_RPC_METHODS else 0]
+        if isinstance(block_identifier, dict):  # EIP-1898 {'blockHash': ...} or {'blockNumber': ...}
+            if 'blockHash' in block_identifier:
+                return True
+            block_identifier = block_identifier.get('blockNumber')
+        if is_block_hash(block_identifier):
+            return True
+        return is_block_number(block_identifier) and chain_head.is_safe(to_block_number(block_identifier))
+    if method in ('eth_getTransactionByHash', 'eth_getTransactionReceipt'):
+        # a transaction can be mined again in another block after a reorg
+        block_number = response['result'].get('blockNumber')
+        return block_number is not None and chain_head.is_safe(to_block_number(block_number))
+    return True
+
+
+def is_block_number(block_identifier):
+    return isinstance(block_identifier, int) or (isinstance(block_identifier, str) and block_identifier not in BLOCK_TAGS)
+
+
+def is_block_hash(block_identifier):
+    return (isinstance(block_identifier, str) and len(block_identifier) == 66) or (
+        isinstance(block_identifier, bytes) and len(block_identifier) == 32)
+
+
+def to_block_number(block_identifier):
+    return block_identifier if isinstance(block_identifier, int) else int(block_identifier, 16)
+
+
+def create_session(pool_size=DEFAULT_POOL_SIZE):
+    # keep-alive session with up to pool_size connections per host
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size,
+                          pool_maxsize=pool_size)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+class PooledHTTPProvider(Web3.HTTPProvider):
+    # HTTPProvider on a pooled keep-alive session, which can also send json-rpc batches over it
+    def __init__(self, endpoint_uri, request_kwargs=None, session=None):
+        self.session = session if session is not None else create_session()
+        super().__init__(endpoint_uri, request_kwargs, self.session)
+
+    def make_batch_request(self, batch):
+        # sends [(method, params), ...] as a single json-rpc batch, returns the responses in the same order
+        body = dumps_bytes([{'jsonrpc': '2.0', 'id': i, 'method': method, 'params': params}
+                            for i, (method, params) in enumerate(batch)])
+        response = self.session.post(
+            self.endpoint_uri, data=body, **self.get_request_kwargs())
+        response.raise_for_status()
+        responses = loads(response.content)
+        if isinstance(responses, dict):  # the whole batch failed
+            raise Exception(responses.get('error', responses))
+        ordered_responses = [None] * len(batch)
+        for response in responses:
+            ordered_responses[response['id']] = response
+        return ordered_responses
+
+
+class MultiEndpointHTTPProvider(JSONBaseProvider):
+    # spreads requests across several json-rpc endpoints (round robin), failing over to the next endpoint
+    # when one cannot be reached or responds with an http error
+    def __init__(self, providers):
+        super().__init__()
+        self.providers = providers
+        self.next_index = itertools.count()
+        self.lock = threading.Lock()
+
+    def make_request(self, method, params):
+        return self.call(lambda provider: provider.make_request(method, params))
+
+    def make_batch_request(self, batch):
+        return self.call(lambda provider: provider.make_batch_request(batch))
+
+    def call(self, request):
+        with self.lock:
+            start = next(self.next_index)
+        for attempt in range(len(self.providers)):
+            provider = self.providers[(start + attempt) % len(self.providers)]
+            try:
+                return request(provider)
+            except requests.RequestException:
+                if attempt == len(self.providers) - 1:
+                    raise
+
+    def isConnected(self):
+        return any(provider.isConnected() for provider in self.providers)
+
+
+def create_web3_provider(urls=None, pool_size=DEFAULT_POOL_SIZE, timeout=DEFAULT_TIMEOUT_SECONDS, cache_size=DEFAULT_CACHE_SIZE,
+                         safe_block_depth=DEFAULT_SAFE_BLOCK_DEPTH):
+    # returns a Web3 instance with pooled keep-alive connections to one or more json-rpc urls (default:
+    # get_json_rpc_url()), which caches up to cache_size responses of immutable calls (off by default).
+    # Results for a block number are only cached for blocks at least safe_block_depth blocks behind the head
+    if urls is None:
+        urls = [get_json_rpc_url()]
+    elif isinstance(urls, str):
+        urls = [urls]
+    providers = [PooledHTTPProvider(url, request_kwargs={'timeout': timeout}, session=create_session(pool_size))
+                 for url in urls]
+    provider = providers[0] if len(
+        providers) == 1 else MultiEndpointHTTPProvider(providers)
+    web3 = Web3(provider)
+    if cache_size > 0:
+        web3.middleware_onion.add(construct_simple_cache_middleware(
+            functools.partial(lru.LRU, cache_size), IMMUTABLE_RPC_METHODS | BLOCK_STATE_RPC_METHODS,
+            functools.partial(should_cache_response, ChainHead(provider, safe_block_depth))), 'response_cache')
+    return web3
+
+
+web3_providers = {}
+web3_providers_lock = threading.Lock()
+
+
+def get_web3_provider_for_url(url):
+    # shared Web3 instance per url, e.g. for polygon calls made while verifying jwts
+    with web3_providers_lock:
+        if url not in web3_providers:
+            web3_providers[url] = create_web3_provider(url)
+        return web3_providers[url]
@@ -0,0 +1,105 @@
+import json
+import pytest
+import requests
+import responses
+from .web3_provider import create_web3_provider, get_web3_provider_for_url
+
+URL = 'http://node-1.test'
+OTHER_URL = 'http://node-2.test'
+
+
+def add_json_rpc_callback(url, calls, results):
+    def callback(request):
+        body = json.loads(request.body)
+        calls.append((url, body['method'], body['params']))
+        return (200, {}, json.dumps({'jsonrpc': '2.0', 'id': body['id'], 'result': results[body['method']]}))
+    responses.add_callback(responses.POST, url, callback=callback)
+
+
+@responses.activate
+def test_caches_immutable_calls_only():
+    calls = []
+    add_json_rpc_callback(URL, calls, {'eth_chainId': '0x1', 'eth_blockNumber': '0x1000',
+                                       'eth_getBalance': '0x5'})
+    web3 = create_web3_provider(URL, cache_size=1024)
+
+    assert web3.eth.chain_id == 1
+    assert web3.eth.chain_id == 1
+    web3.eth.block_number
+    web3.eth.block_number
+    web3.eth.get_balance('0x' + '1' * 40, 100)
+    web3.eth.get_balance('0x' + '1' * 40, 100)
+    web3.eth.get_balance('0x' + '1' * 40, 'latest')
+    web3.eth.get_balance('0x' + '1' * 40, 'latest')
+
+    assert [method for _, method, _ in calls] == ['eth_chainId', 'eth_blockNumber', 'eth_blockNumber',
+                                                  'eth_getBalance', 'eth_blockNumber', 'eth_getBalance',
+                                                  'eth_getBalance']
+
+
+def test_does_not_cache_responses_by_default():
+    assert 'response_cache' not in create_web3_provider(URL).middleware_onion
+    assert 'response_cache' in create_web3_provider(URL, cache_size=1024).middleware_onion
+
+
+@responses.activate
+def test_does_not_cache_blocks_within_reorg_depth_of_head():
+    calls = []
+    block = {'number': '0xfff', 'hash': '0x' + '3' * 64, 'transactions': []}
+    add_json_rpc_callback(URL, calls, {'eth_blockNumber': '0x1000', 'eth_getBlockByNumber': block,
+                                       'eth_getBlockByHash': block})
+    web3 = create_web3_provider(URL, cache_size=1024, safe_block_depth=64)
+
+    web3.eth.get_block(0x1000 - 1)
+    web3.eth.get_block(0x1000 - 1)
+    web3.eth.get_block('0x' + '3' * 64)
+    web3.eth.get_block('0x' + '3' * 64)
+    web3.eth.get_block(0x1000 - 64)
+    web3.eth.get_block(0x1000 - 64)
+
+    # the head is fetched once and refreshed at most every second
+    assert [method for _, method, _ in calls] == ['eth_getBlockByNumber', 'eth_blockNumber', 'eth_getBlockByNumber',
+                                                  'eth_getBlockByHash', 'eth_getBlockByNumber']
+
+
+@responses.activate
+def test_balances_and_fails_over_across_endpoints():
+    calls = []
+    add_json_rpc_callback(URL, calls, {'eth_blockNumber': '0x10'})
+    responses.add(responses.POST, OTHER_URL, status=503)
+    web3 = create_web3_provider([URL, OTHER_URL], cache_size=0)
+
+    assert [web3.eth.block_number for _ in range(4)] == [16] * 4
+
+    assert len(calls) == 4
+    assert len([call for call in responses.calls if call.request.url.startswith(OTHER_URL)]) == 2
+
+
+@responses.activate
+def test_sends_batches_through_the_provider_with_failover():
+    def callback(request):
+        body = json.loads(request.body)
+        return (200, {}, json.dumps([{'jsonrpc': '2.0', 'id': r['id'], 'result': r['params'][0]} for r in reversed(body)]))
+    responses.add(responses.POST, URL, status=503)
+    responses.add_callback(responses.POST, OTHER_URL, callback=callback)
+    web3 = create_web3_provider([URL, OTHER_URL])
+
+    results = [web3.provider.make_batch_request([('eth_getTransactionReceipt', [tx_hash]) for tx_hash in ('0x1', '0x2')])
+               for _ in range(2)]
+
+    assert [[response['result'] for response in batch] for batch in results] == [['0x1', '0x2']] * 2
+
+
+@responses.activate
+def test_raises_when_all_endpoints_fail():
+    responses.add(responses.POST, URL, status=503)
+    responses.add(responses.POST, OTHER_URL, status=503)
+    web3 = create_web3_provider([URL, OTHER_URL])
+
+    with pytest.raises(requests.HTTPError):
+        web3.eth.block_number
+
+
+def test_shares_provider_per_url():
+    assert get_web3_provider_for_url(URL) is get_web3_provider_for_url(URL)
+    assert get_web3_provider_for_url(URL) is not get_web3_provider_for_url(OTHER_URL)
@@ -0,0 +1,166 @@
+# Persistent handler worker for python bots, intended to be spawned once by the forta cli:
+#
+#   python -m forta_agent.worker <agent module> [--context <path>] [--lazy] [--processes <n>] [--concurrency <n>]
+#
+# Messages in both directions are framed as a 4-byte big-endian length followed by a
+# UTF-8 JSON body. Requests and responses:
+#
+#   {"msgType": "initialize"}                      -> {"response": <initialize() return value>}
+#   {"msgType": "health_check"}                    -> {"response": <health_check() return value>}
+#   {"msgType": "handle_transaction", "events": [...]}
+#   {"msgType": "handle_block", "events": [...]}
+#   {"msgType": "handle_alert", "events": [...]}   -> {"findings": [[<finding>, ...], ...]}
+#
+# findings are returned as one list per event, in the same order as the events of the batch.
+# If a handler raises, an {"error": <traceback>} frame is written and the worker exits so that
+# the bot is re-initialized before receiving more data. Anything the bot prints goes to stderr.
+# With --processes, transaction batches are spread across forked processes (see handler_pool).
+# Handlers can also be `async def`, in which case the events of a batch are handled concurrently
+# (up to --concurrency at a time) on an event loop.
+import sys
+import os
+import struct
+import argparse
+import inspect
+import importlib
+import traceback
+from .block_event import BlockEvent
+from .transaction_event import TransactionEvent
+from .alert_event import AlertEvent
+from .serialization import loads, dumps_bytes
+from .async_runner import AsyncRunner, DEFAULT_CONCURRENCY
+
+INITIALIZE_METHOD_NAME = "initialize"
+HANDLE_TRANSACTION_METHOD_NAME = "handle_transaction"
+HANDLE_BLOCK_METHOD_NAME = "handle_block"
+HANDLE_ALERT_METHOD_NAME = "handle_alert"
+HEALTH_CHECK_METHOD_NAME = "health_check"
+HANDLER_METHOD_NAMES = [INITIALIZE_METHOD_NAME, HANDLE_TRANSACTION_METHOD_NAME,
+                        HANDLE_BLOCK_METHOD_NAME, HANDLE_ALERT_METHOD_NAME, HEALTH_CHECK_METHOD_NAME]
+
+FRAME_HEADER = struct.Struct('>I')
+
+
+def read_message(stream):
+    # returns None when the stream is closed between messages
+    header = stream.read(FRAME_HEADER.size)
+    if not header:
+        return None
+    if len(header) < FRAME_HEADER.size:
+        raise EOFError("truncated message header")
+    (length,) = FRAME_HEADER.unpack(header)
+    body = stream.read(length)
+    if len(body) < length:
+        raise EOFError("truncated message body")
+    return loads(body)
+
+
+def write_message(stream, message):
+    body = dumps_bytes(message)
+    stream.write(FRAME_HEADER.pack(len(body)) + body)
+    stream.flush()
+
+
+def has_async_handlers(agent):
+    return any(inspect.iscoroutinefunction(getattr(agent, name, None)) for name in HANDLER_METHOD_NAMES)
+
+
+def load_agent(agent_module, context_path=None):
+    context_path = context_path if context_path else os.getcwd()
+    if context_path not in sys.path:
+        sys.path.append(context_path)
+    return importlib.import_module(agent_module)
+
+
+class Worker:
+    def __init__(self, agent, lazy=False, pool=None, concurrency=DEFAULT_CONCURRENCY):
+        self.agent = agent
+        self.lazy = lazy
+        self.pool = pool  # optional HandlerPool to fan transaction batches out to
+        # async handlers run on an event loop, handling up to `concurrency` events of a batch at once
+        self.async_runner = AsyncRunner(
+            concurrency) if has_async_handlers(agent) else None
+        self.event_factories = {
+            HANDLE_TRANSACTION_METHOD_NAME: lambda d: TransactionEvent(d, lazy),
+            HANDLE_BLOCK_METHOD_NAME: BlockEvent,
+            HANDLE_ALERT_METHOD_NAME: AlertEvent,
+        }
+
+    def handle_message(self, message):
+        msg_type = message['msgType']
+        if self.pool is not None:
+            if msg_type == INITIALIZE_METHOD_NAME:
+                return {'response': self.pool.start()}
+            if msg_type == HEALTH_CHECK_METHOD_NAME:
+                return {'response': self.pool.health_check()}
+        if msg_type in (INITIALIZE_METHOD_NAME, HEALTH_CHECK_METHOD_NAME):
+            handler = getattr(self.agent, msg_type, None)
+            return {'response': self.call(handler) if handler is not None else None}
+        if msg_type in self.event_factories:
+            return {'findings': self.handle_events(msg_type, message.get('events', []))}
+        raise Exception(f'unknown msgType: {msg_type}')
+
+    def handle_events(self, msg_type, events):
+        if self.pool is not None and msg_type == HANDLE_TRANSACTION_METHOD_NAME:
+            return [self.serialize_findings(findings) for findings in self.pool.handle(msg_type, events)]
+        handler = getattr(self.agent, msg_type)
+        create_event = self.event_factories[msg_type]
+        if self.async_runner is not None:
+            results = self.async_runner.handle(
+                lambda event: handler(create_event(event)), events)
+            return [self.serialize_findings(findings) for findings in results]
+        return [self.serialize_findings(handler(create_event(event))) for event in events]
+
+    def call(self, handler, *args):
+        result = handler(*args)
+        if self.async_runner is not None:
+            result = self.async_runner.run(result)
+        return result
+
+    def serialize_findings(self, findings):
+        return [finding.to_dict() for finding in findings or []]
+
+
+def run(worker, input_stream, output_stream):
+    while True:
+        message = read_message(input_stream)
+        if message is None:
+            return
+        try:
+            response = worker.handle_message(message)
+        except Exception:
+            write_message(output_stream, {'error': traceback.format_exc()})
+            raise
+        write_message(output_stream, response)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m forta_agent.worker')
+    parser.add_argument('agent_module')
+    parser.add_argument('--context', default=None)
+    parser.add_argument('--lazy', action='store_true',
+                        help='build transaction event sub-objects on first access')
+    parser.add_argument('--processes', type=int, default=1,
+                        help='number of worker processes to handle transactions with')
+    parser.add_argument('--concurrency', type=int, default=DEFAULT_CONCURRENCY,
+                        help='max events of a batch handled at the same time by async handlers')
+    args, _ = parser.parse_known_args(argv)
+
+    # keep the binary stdout for framed messages and send bot output to stderr
+    output_stream = sys.stdout.buffer
+    sys.stdout = sys.stderr
+    agent = load_agent(args.agent_module, args.context)
+    pool = None
+    if args.processes > 1:
+        from .handler_pool import HandlerPool  # avoid circular import
+        pool = HandlerPool(agent, args.processes, lazy=args.lazy)
+    try:
+        run(Worker(agent, args.lazy, pool, args.concurrency),
+            sys.stdin.buffer, output_stream)
+    finally:
+        if pool is not None and pool.started:
+            pool.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,128 @@
+import io
+import sys
+import subprocess
+from types import SimpleNamespace
+import pytest
+from .worker import Worker, read_message, write_message, run, FRAME_HEADER
+
+AGENT_SOURCE = '''
+from forta_agent import Finding, FindingSeverity, FindingType
+
+
+def initialize():
+    print("initializing")
+    return {"alertConfig": {}}
+
+
+def handle_transaction(tx_event):
+    print("handling", tx_event.hash)
+    if tx_event.to is None:
+        return []
+    return [Finding({"name": "name", "description": tx_event.hash, "alert_id": "ALERT-1",
+                     "severity": FindingSeverity.Low, "type": FindingType.Info})]
+'''
+
+
+def test_read_and_write_message_round_trip():
+    stream = io.BytesIO()
+    write_message(stream, {'msgType': 'initialize'})
+    write_message(stream, {'msgType': 'health_check'})
+    stream.seek(0)
+
+    assert read_message(stream) == {'msgType': 'initialize'}
+    assert read_message(stream) == {'msgType': 'health_check'}
+    assert read_message(stream) is None
+
+
+def test_read_message_raises_on_truncated_frame():
+    stream = io.BytesIO(FRAME_HEADER.pack(10) + b'{}')
+
+    with pytest.raises(EOFError):
+        read_message(stream)
+
+
+def test_worker_returns_findings_per_event_in_batch_order(create_finding):
+    agent = SimpleNamespace(handle_transaction=lambda tx_event: [
+        create_finding(tx_event.hash)] if tx_event.to else [])
+    worker = Worker(agent)
+
+    response = worker.handle_message({'msgType': 'handle_transaction', 'events': [
+        {'transaction': {'hash': '0x1', 'to': '0xa'}},
+        {'transaction': {'hash': '0x2', 'to': None}},
+        {'transaction': {'hash': '0x3', 'to': '0xb'}},
+    ]})
+
+    findings = response['findings']
+    assert len(findings) == 3
+    assert [len(f) for f in findings] == [1, 0, 1]
+    assert findings[0][0]['description'] == '0x1'
+    assert findings[2][0]['description'] == '0x3'
+    assert findings[0][0]['alertId'] == 'ALERT-1'
+
+
+def test_worker_handles_missing_initialize():
+    worker = Worker(SimpleNamespace())
+
+    assert worker.handle_message({'msgType': 'initialize'}) == {
+        'response': None}
+
+
+def test_run_writes_error_frame_and_raises_on_handler_exception():
+    def handle_block(block_event):
+        raise ValueError('boom')
+    input_stream = io.BytesIO()
+    write_message(input_stream, {'msgType': 'handle_block', 'events': [{}]})
+    input_stream.seek(0)
+    output_stream = io.BytesIO()
+
+    with pytest.raises(ValueError):
+        run(Worker(SimpleNamespace(handle_block=handle_block)),
+            input_stream, output_stream)
+
+    output_stream.seek(0)
+    assert 'boom' in read_message(output_stream)['error']
+
+
+def test_worker_process_keeps_bot_output_out_of_frames(tmp_path):
+    (tmp_path / 'test_agent.py').write_text(AGENT_SOURCE)
+    requests = io.BytesIO()
+    write_message(requests, {'msgType': 'initialize'})
+    write_message(requests, {'msgType': 'handle_transaction', 'events': [
+        {'transaction': {'hash': '0x1', 'to': '0xa'}},
+        {'transaction': {'hash': '0x2'}},
+    ]})
+
+    process = subprocess.run(
+        [sys.executable, '-m', 'forta_agent.worker',
+            'test_agent', '--context', str(tmp_path), '--lazy'],
+        input=requests.getvalue(), stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=True)
+
+    responses = io.BytesIO(process.stdout)
+    assert read_message(responses) == {'response': {'alertConfig': {}}}
+    findings = read_message(responses)['findings']
+    assert [len(f) for f in findings] == [1, 0]
+    assert findings[0][0]['description'] == '0x1'
+    assert read_message(responses) is None
+    assert b'initializing' in process.stderr
+
+
+def test_worker_process_fans_transactions_out_to_handler_pool(tmp_path):
+    (tmp_path / 'test_agent.py').write_text(AGENT_SOURCE)
+    requests = io.BytesIO()
+    write_message(requests, {'msgType': 'initialize'})
+    write_message(requests, {'msgType': 'handle_transaction', 'events': [
+        {'transaction': {'hash': hex(i), 'to': '0xa' if i % 2 else None}} for i in range(10)]})
+    write_message(requests, {'msgType': 'health_check'})
+
+    process = subprocess.run(
+        [sys.executable, '-m', 'forta_agent.worker',
+            'test_agent', '--context', str(tmp_path), '--processes', '2'],
+        input=requests.getvalue(), stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=True, timeout=60)
+
+    responses = io.BytesIO(process.stdout)
+    assert read_message(responses) == {'response': {'alertConfig': {}}}
+    findings = read_message(responses)['findings']
+    assert [len(f) for f in findings] == [i % 2 for i in range(10)]
+    assert [f[0]['description'] for f in findings if f] == [
+        hex(i) for i in range(1, 10, 2)]
+    assert read_message(responses) == {'response': None}